@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Adaptive Trigger - Burst-aware, severity-aware analysis triggering per channel
+Bursts are debounced into one analysis after a quiet gap, analyses per channel are capped
+per hour, and the time trigger shortens while impact/outage signals are present
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+
+QUIET_GAP = float(os.getenv('ANALYSIS_QUIET_GAP', '60'))  # seconds without messages that end a burst
+MAX_DEBOUNCE = float(os.getenv('ANALYSIS_MAX_DEBOUNCE', '300'))  # longest a burst can postpone its analysis
+BURST_RATE = int(os.getenv('ANALYSIS_BURST_RATE', '20'))  # messages per minute that count as a burst
+HOURLY_CAP = int(os.getenv('ANALYSIS_HOURLY_CAP', '6'))  # analyses per channel per rolling hour
+SEVERE_INTERVAL = float(os.getenv('ANALYSIS_SEVERE_INTERVAL', '300'))  # time trigger while severity signals are active
+SEVERITY_WINDOW = float(os.getenv('SEVERITY_SIGNAL_WINDOW', '900'))  # how long a severity keyword keeps a channel elevated
+
+RATE_WINDOW = 60.0
+MIN_RATE_SPAN = 10.0  # shortest span a burst's rate is measured over, so a few quick messages are not a burst
+
+# Phrases that mean customers are hurting right now; recovery wording ('contained', 'back to normal') is excluded
+SEVERITY_RE = re.compile(
+    r"(?<!\w)(?:outage|(?:is|are|went|going) down|unavailable|degraded|sev ?[0-2](?!\d)|"
+    r"customers? (?:are |is )?(?:affected|impacted|reporting)|"
+    r"\d+(?:\.\d+)?% of (?:requests|users|customers|traffic)|"
+    r"(?:failing|erroring|timing out) for (?:all|every|most)\w*)(?!\w)",
+    re.IGNORECASE
+)
+
+
+class _ChannelTrigger:
+    __slots__ = ('arrivals', 'burst_started', 'burst_count', 'debounce_from', 'analyses', 'severity_seen',
+                 'incident_severe', 'reason')
+
+    def __init__(self):
+        self.arrivals = deque()  # monotonic arrival times within RATE_WINDOW
+        self.burst_started = None  # first message of the current run (no gap longer than quiet_gap)
+        self.burst_count = 0  # messages in the current run
+        self.debounce_from = None  # start of the current max_debounce window (run start, or last analysis)
+        self.analyses = deque()  # monotonic start times within the last hour
+        self.severity_seen = None  # last impact/outage keyword
+        self.incident_severe = False  # incident state reports high severity and is not resolved
+        self.reason = None  # why the pending deadline was set
+
+
+class AdaptiveTrigger:
+    def __init__(self, message_threshold: int = 10, analysis_interval: float = 1800,
+                 quiet_gap: float = QUIET_GAP, max_debounce: float = MAX_DEBOUNCE, burst_rate: int = BURST_RATE,
+                 hourly_cap: int = HOURLY_CAP, severe_interval: float = SEVERE_INTERVAL):
+        """
+        Initialize the trigger policy
+
+        Args:
+            message_threshold: Buffered messages that trigger an analysis outside bursts
+            analysis_interval: Seconds after the last analysis before buffered messages are analyzed anyway
+            quiet_gap: Seconds without messages after which a burst is analyzed
+            max_debounce: Maximum seconds a burst can postpone its analysis
+            burst_rate: Messages per minute at which threshold triggers are debounced
+            hourly_cap: Maximum analyses per channel per rolling hour (0 disables the cap)
+            severe_interval: Time trigger used while impact/outage signals are active
+        """
+        self.message_threshold = message_threshold
+        self.analysis_interval = analysis_interval
+        self.quiet_gap = quiet_gap
+        self.max_debounce = max_debounce
+        self.burst_rate = burst_rate
+        self.hourly_cap = hourly_cap
+        self.severe_interval = severe_interval
+        self._channels = {}  # channel_id -> _ChannelTrigger
+        self._lock = threading.Lock()
+        self.stats = {'immediate': 0, 'debounced': 0, 'timed': 0, 'severe': 0, 'capped': 0}
+
+    def on_message(self, channel_id: str, text: str, buffered: int, since_last_analysis: float) -> Tuple[float, str]:
+        """
+        Decide when a channel should next be analyzed after a new message
+
+        Args:
+            channel_id: Channel the message arrived in
+            text: Message text (scanned for impact/outage signals)
+            buffered: Messages buffered since the last analysis, including this one
+            since_last_analysis: Seconds since the channel's last analysis
+
+        Returns:
+            Tuple of (delay in seconds, trigger reason); the caller moves the channel's deadline to it
+        """
+        now = time.monotonic()
+        severe_keyword = SEVERITY_RE.search(text or '') is not None
+
+        with self._lock:
+            channel = self._channel(channel_id)
+            if not channel.arrivals or now - channel.arrivals[-1] > self.quiet_gap:
+                channel.burst_started = channel.debounce_from = now
+                channel.burst_count = 0
+            channel.burst_count += 1
+            channel.arrivals.append(now)
+            while channel.arrivals and now - channel.arrivals[0] > RATE_WINDOW:
+                channel.arrivals.popleft()
+            if severe_keyword:
+                channel.severity_seen = now
+
+            severe = self._is_severe(channel, now)
+            interval = self.severe_interval if severe else self.analysis_interval
+            delay = max(0.0, interval - since_last_analysis)
+            reason = "severity signal" if severe else "time interval"
+
+            if buffered >= self.message_threshold:
+                if self._is_burst(channel, now):
+                    # Burst: wait for a quiet gap, but never longer than max_debounce from its start (or last analysis)
+                    debounce = min(self.quiet_gap, channel.debounce_from + self.max_debounce - now)
+                    if debounce < delay:
+                        delay, reason = max(0.0, debounce), f"burst of {buffered} messages settled"
+                        self.stats['debounced'] += 1
+                else:
+                    delay, reason = 0.0, f"{buffered} messages"
+                    self.stats['immediate'] += 1
+            elif severe:
+                self.stats['severe'] += 1
+            else:
+                self.stats['timed'] += 1
+
+            # A channel that used up its hourly cap waits for a free slot instead of firing per message
+            delay = max(delay, self._cap_wait(channel, now))
+            channel.reason = reason
+            return delay, reason
+
+    def admit(self, channel_id: str) -> Tuple[float, Optional[str]]:
+        """
+        Check the hourly cap when a channel's deadline fires (the slot is used by record_run)
+
+        Returns:
+            Tuple of (0 and the trigger reason) when the analysis may start, or (seconds to wait, None)
+        """
+        now = time.monotonic()
+        with self._lock:
+            channel = self._channel(channel_id)
+            wait = self._cap_wait(channel, now)
+            if wait > 0:
+                self.stats['capped'] += 1
+                return wait, None
+            return 0.0, channel.reason or "time interval"
+
+    def record_run(self, channel_id: str):
+        """Use one hourly-cap slot for an analysis that actually started"""
+        now = time.monotonic()
+        with self._lock:
+            channel = self._channel(channel_id)
+            channel.analyses.append(now)
+            channel.debounce_from = now
+
+    def set_incident_severity(self, channel_id: str, severe: bool):
+        """Keep the shorter interval while the channel's incident state reports high, unresolved severity"""
+        with self._lock:
+            self._channel(channel_id).incident_severe = severe
+
+    def is_severe(self, channel_id: str) -> bool:
+        with self._lock:
+            channel = self._channels.get(channel_id)
+            return channel is not None and self._is_severe(channel, time.monotonic())
+
+    def forget(self, channel_id: str):
+        with self._lock:
+            self._channels.pop(channel_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, channels=len(self._channels))
+
+    def _channel(self, channel_id: str) -> _ChannelTrigger:
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = self._channels[channel_id] = _ChannelTrigger()
+        return channel
+
+    def _cap_wait(self, channel: _ChannelTrigger, now: float) -> float:
+        """Seconds until the channel has a free hourly-cap slot (0 when it has one)"""
+        while channel.analyses and now - channel.analyses[0] > 3600:
+            channel.analyses.popleft()
+        if self.hourly_cap and len(channel.analyses) >= self.hourly_cap:
+            return channel.analyses[0] + 3600 - now
+        return 0.0
+
+    def _is_burst(self, channel: _ChannelTrigger, now: float) -> bool:
+        """Posting at burst_rate or faster, over the last minute or over the current run so far"""
+        if len(channel.arrivals) >= self.burst_rate:
+            return True
+        span = max(now - channel.burst_started, MIN_RATE_SPAN)
+        return channel.burst_count * 60.0 / span >= self.burst_rate
+
+    @staticmethod
+    def _is_severe(channel: _ChannelTrigger, now: float) -> bool:
+        recent_signal = channel.severity_seen is not None and now - channel.severity_seen <= SEVERITY_WINDOW
+        return recent_signal or channel.incident_severe
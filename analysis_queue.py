@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Analysis Queue - Background worker pool for channel analyses
+Ingestion only enqueues channels; analyses run on bounded workers with at most one
+in flight per channel, and requests made while one runs are coalesced into a single rerun
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable
+
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '4'))
+
+
+class AnalysisWorkerPool:
+    def __init__(self, run: Callable[[str], None], max_workers: int = ANALYSIS_WORKERS):
+        """
+        Initialize the worker pool
+
+        Args:
+            run: Analysis function, called with a channel ID on a worker thread
+            max_workers: Maximum analyses running at once across all channels
+        """
+        self.run = run
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._lock = threading.Lock()
+        self._in_flight = set()  # channels queued or running
+        self._rerun = set()  # channels requested again while in flight
+        self._running = 0
+        self.stats = {'submitted': 0, 'coalesced': 0, 'completed': 0, 'failed': 0, 'total_wait_seconds': 0.0}
+
+    def submit(self, channel_id: str) -> bool:
+        """
+        Request an analysis of a channel
+
+        Returns:
+            True if a run was queued, False if it was folded into the run already in flight
+        """
+        with self._lock:
+            if channel_id in self._in_flight:
+                if channel_id not in self._rerun:
+                    self._rerun.add(channel_id)
+                    self.stats['coalesced'] += 1
+                return False
+            self._in_flight.add(channel_id)
+            self.stats['submitted'] += 1
+        self._executor.submit(self._work, channel_id, time.monotonic())
+        return True
+
+    def in_flight(self, channel_id: str) -> bool:
+        with self._lock:
+            return channel_id in self._in_flight
+
+    def _work(self, channel_id: str, queued_at: float):
+        with self._lock:
+            self._running += 1
+            self.stats['total_wait_seconds'] += time.monotonic() - queued_at
+
+        try:
+            self.run(channel_id)
+            outcome = 'completed'
+        except Exception as e:
+            print(f"❌ Background analysis of {channel_id} failed: {e}")
+            outcome = 'failed'
+
+        with self._lock:
+            self._running -= 1
+            self.stats[outcome] += 1
+            rerun = channel_id in self._rerun
+            self._rerun.discard(channel_id)
+            if not rerun:
+                self._in_flight.discard(channel_id)
+        if rerun:
+            # Still marked in flight, so the channel keeps a single run; messages that arrived meanwhile go in this one
+            try:
+                self._executor.submit(self._work, channel_id, time.monotonic())
+            except RuntimeError:  # pool shut down
+                with self._lock:
+                    self._in_flight.discard(channel_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats, running=self._running, queued=len(self._in_flight) - self._running)
+        started = stats['completed'] + stats['failed'] + stats['running']
+        stats['avg_wait_seconds'] = round(stats.pop('total_wait_seconds') / started, 3) if started else 0.0
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work; queued analyses that have not started are dropped"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Backfill - Re-analyze past incident channels from a standard Slack export zip
+Streams one channel-day file at a time straight out of the archive, shards channel-days
+across a process pool sharing one model call budget, and writes resumable JSONL results
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from event_ingestion import CONTENT_SUBTYPES
+
+# Channel-day members of a Slack export: "<channel>/<YYYY-MM-DD>.json"
+_SHARD_RE = re.compile(r'^(?P<channel>[^/]+)/(?P<day>\d{4}-\d{2}-\d{2})\.json$')
+
+DEFAULT_CALLS_PER_MINUTE = float(os.getenv('BACKFILL_CALLS_PER_MINUTE', '60'))
+
+
+class SharedRateLimiter:
+    def __init__(self, calls_per_minute: float):
+        """
+        Rate limiter shared by every worker process (pass it to workers at pool creation)
+
+        Args:
+            calls_per_minute: Model calls allowed per minute across the whole pool (0 disables the limit)
+        """
+        self.interval = 60.0 / calls_per_minute if calls_per_minute > 0 else 0.0
+        self._next_slot = multiprocessing.Value('d', 0.0)  # earliest time the next call may start
+
+    def acquire(self):
+        """Block until this process may make one model call"""
+        if not self.interval:
+            return
+        with self._next_slot.get_lock():
+            now = time.time()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def list_shards(archive_path: str, channels: Optional[List[str]] = None, since: Optional[str] = None,
+                until: Optional[str] = None) -> List[str]:
+    """
+    List channel-day members of an export, oldest day first
+
+    Args:
+        archive_path: Slack export zip
+        channels: Only include these channel folders
+        since: First day to include (YYYY-MM-DD)
+        until: Last day to include (YYYY-MM-DD)
+    """
+    shards = []
+    with zipfile.ZipFile(archive_path) as archive:
+        for name in archive.namelist():
+            match = _SHARD_RE.match(name)
+            if not match:
+                continue
+            if channels and match.group('channel') not in channels:
+                continue
+            if (since and match.group('day') < since) or (until and match.group('day') > until):
+                continue
+            shards.append(name)
+
+    return sorted(shards, key=lambda name: (name.split('/')[1], name))
+
+
+def load_user_names(archive_path: str) -> Dict[str, str]:
+    """Map user IDs to display names from the export's users.json"""
+    with zipfile.ZipFile(archive_path) as archive:
+        if 'users.json' not in archive.namelist():
+            return {}
+        with archive.open('users.json') as f:
+            users = json.load(f)
+
+    names = {}
+    for user in users:
+        profile = user.get('profile') or {}
+        names[user['id']] = profile.get('display_name') or user.get('real_name') or user.get('name') or user['id']
+    return names
+
+
+def iter_shard_messages(archive: zipfile.ZipFile, shard: str, user_names: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+    """Yield analyzer-ready messages from one channel-day file, read directly from the archive"""
+    with archive.open(shard) as f:
+        raw_messages = json.load(f)
+
+    for raw in raw_messages:
+        if raw.get('subtype') not in CONTENT_SUBTYPES or not raw.get('text'):
+            continue
+        user_id = raw.get('user') or raw.get('bot_id') or 'Unknown'
+        yield {
+            'text': raw['text'],
+            'timestamp': datetime.fromtimestamp(float(raw.get('ts', 0))).isoformat(),
+            'user': user_names.get(user_id) or raw.get('username') or user_id,
+            'ts': raw.get('ts')
+        }
+
+
+class BackfillCheckpoint:
+    def __init__(self, path: str):
+        """
+        Completed-shard log kept next to the JSONL output
+
+        Each line records a finished shard and the output size after its records were written,
+        so a resumed run can drop records from a shard that was interrupted mid-write.
+
+        Args:
+            path: Checkpoint file (JSONL)
+        """
+        self.path = path
+        self.completed = set()
+        self.output_offset = 0
+
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash
+                    self.completed.add(entry['shard'])
+                    self.output_offset = max(self.output_offset, entry['offset'])
+
+    def record(self, shard: str, offset: int):
+        """Mark a shard complete once its records are durably written"""
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'shard': shard, 'offset': offset}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.completed.add(shard)
+        self.output_offset = offset
+
+
+# Per-worker state, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(archive_path: str, user_names: Dict[str, str], rate_limiter: SharedRateLimiter, window_size: int):
+    """Open the archive and build an analyzer once per worker process"""
+    from batch_analyzer import BatchMessageAnalyzer
+    from classification_cache import ClassificationCache, CLASSIFICATION_CACHE_PATH
+    from vertex_client import reset_clients
+
+    reset_clients()  # never reuse a connection pool inherited across fork
+    _worker['archive'] = zipfile.ZipFile(archive_path)
+    _worker['user_names'] = user_names
+    _worker['window_size'] = window_size
+    # Workers only read the shared SQLite cache: concurrent commit-per-put writers contend for its lock
+    shared = CLASSIFICATION_CACHE_PATH if CLASSIFICATION_CACHE_PATH and os.path.exists(CLASSIFICATION_CACHE_PATH) else None
+    cache = ClassificationCache(db_path=shared, read_only=True)
+    _worker['analyzer'] = BatchMessageAnalyzer(rate_limiter=rate_limiter, cache=cache)
+
+
+def _analyze_shard(shard: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """Analyze one channel-day and return its JSONL records"""
+    from llm_governor import llm_priority, PRIORITY_LOW
+
+    channel, day = shard[:-len('.json')].split('/')
+    message_ts = []
+
+    def messages():
+        for message in iter_shard_messages(_worker['archive'], shard, _worker['user_names']):
+            message_ts.append(message['ts'])
+            yield message
+
+    records = []
+    with llm_priority(PRIORITY_LOW):  # bulk work yields to any interactive call sharing this process's governor
+        analyses = _worker['analyzer'].iter_analyze(messages(), window_size=_worker['window_size'])
+        for position, analysis in enumerate(analyses):
+            records.append({
+                'channel': channel,
+                'day': day,
+                'ts': message_ts[position],
+                'timestamp': analysis['timestamp'],
+                'user': analysis['user'],
+                'text': analysis['original_text'],
+                'significant': analysis.get('significant', False),
+                'category': analysis.get('category'),
+                'reason': analysis.get('reason'),
+                'confidence': analysis.get('confidence'),
+                'tier': analysis.get('tier'),
+                'cluster_id': analysis.get('cluster_id'),
+                'cluster_size': analysis.get('cluster_size')
+            })
+    return shard, records
+
+
+def run_backfill(archive_path: str, output_path: str, checkpoint_path: Optional[str] = None,
+                 workers: Optional[int] = None, calls_per_minute: float = DEFAULT_CALLS_PER_MINUTE,
+                 channels: Optional[List[str]] = None, since: Optional[str] = None, until: Optional[str] = None,
+                 window_size: int = 20, force: bool = False) -> Dict[str, Any]:
+    """
+    Analyze every channel-day in an export, resuming from the checkpoint if one exists
+
+    Existing output without a checkpoint is never overwritten, and a checkpoint whose output is
+    missing or shorter than recorded is never resumed, unless force is set (which starts over).
+
+    Args:
+        archive_path: Slack export zip
+        output_path: JSONL file receiving one record per analyzed message
+        checkpoint_path: Completed-shard log (defaults to <output_path>.checkpoint)
+        workers: Worker processes (defaults to the CPU count)
+        calls_per_minute: Model call budget shared by all workers
+        channels: Only include these channel folders
+        since: First day to include (YYYY-MM-DD)
+        until: Last day to include (YYYY-MM-DD)
+        window_size: Messages classified together per batched call
+        force: Start over, overwriting existing output and discarding an unusable checkpoint
+
+    Returns:
+        Dict with shard and message counts
+
+    Raises:
+        FileExistsError: The output file has records but no checkpoint to resume from, and force is not set
+        FileNotFoundError: The checkpoint records results the output file no longer holds, and force is not set
+    """
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    if not force and not os.path.exists(checkpoint_path) and os.path.exists(output_path) \
+            and os.path.getsize(output_path) > 0:
+        raise FileExistsError(f"{output_path} already has results but no checkpoint ({checkpoint_path}); "
+                              f"use --force to overwrite it")
+    checkpoint = BackfillCheckpoint(checkpoint_path)
+    output_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+    if checkpoint.output_offset > output_size:
+        # Completed shards would be skipped while their records are gone (and truncate() would pad with NULs)
+        if not force:
+            raise FileNotFoundError(f"{checkpoint_path} records {checkpoint.output_offset} bytes of results but "
+                                    f"{output_path} has {output_size}; restore it or use --force to start over")
+        os.remove(checkpoint_path)
+        checkpoint = BackfillCheckpoint(checkpoint_path)
+    shards = [shard for shard in list_shards(archive_path, channels, since, until) if shard not in checkpoint.completed]
+    stats = {'shards_total': len(shards) + len(checkpoint.completed), 'shards_skipped': len(checkpoint.completed),
+             'shards_done': 0, 'shards_failed': 0, 'messages': 0, 'significant': 0}
+
+    print(f"📦 {stats['shards_total']} channel-days in {archive_path} "
+          f"({stats['shards_skipped']} already done, {len(shards)} to go)")
+
+    # Drop records from a shard that was being written when a previous run stopped
+    mode = 'r+b' if os.path.exists(output_path) else 'wb'
+    with open(output_path, mode) as output:
+        output.truncate(checkpoint.output_offset)
+        output.seek(checkpoint.output_offset)
+        if not shards:
+            return stats
+
+        rate_limiter = SharedRateLimiter(calls_per_minute)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(archive_path, load_user_names(archive_path), rate_limiter, window_size)) as pool:
+            futures = {pool.submit(_analyze_shard, shard): shard for shard in shards}
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    _, records = future.result()
+                except Exception as e:
+                    stats['shards_failed'] += 1
+                    print(f"❌ {shard}: {e}")
+                    continue
+
+                output.write(''.join(json.dumps(record) + '\n' for record in records).encode('utf-8'))
+                output.flush()
+                os.fsync(output.fileno())
+                checkpoint.record(shard, output.tell())
+
+                stats['shards_done'] += 1
+                stats['messages'] += len(records)
+                stats['significant'] += sum(1 for record in records if record['significant'])
+                print(f"  ✅ {shard}: {len(records)} messages "
+                      f"({stats['shards_done']}/{len(shards)})")
+
+    return stats
+
+
+def main():
+    """Backfill analyses from a Slack export archive"""
+    parser = argparse.ArgumentParser(description="Re-analyze past incident channels from a Slack export zip")
+    parser.add_argument('archive', help="Slack export zip")
+    parser.add_argument('--output', default='backfill_results.jsonl', help="JSONL output file")
+    parser.add_argument('--checkpoint', help="Checkpoint file (defaults to <output>.checkpoint)")
+    parser.add_argument('--workers', type=int, help="Worker processes (defaults to the CPU count)")
+    parser.add_argument('--calls-per-minute', type=float, default=DEFAULT_CALLS_PER_MINUTE,
+                        help="Model calls per minute shared by all workers (0 for unlimited)")
+    parser.add_argument('--channel', action='append', dest='channels', help="Channel folder to include (repeatable)")
+    parser.add_argument('--since', help="First day to include (YYYY-MM-DD)")
+    parser.add_argument('--until', help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument('--force', action='store_true',
+                        help="Start over when the output has no checkpoint or the checkpoint has no output")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.archive):
+        print(f"Error: {args.archive} not found")
+        return
+
+    started = time.time()
+    try:
+        stats = run_backfill(args.archive, args.output, args.checkpoint, args.workers, args.calls_per_minute,
+                             args.channels, args.since, args.until, force=args.force)
+    except (FileExistsError, FileNotFoundError) as e:
+        print(f"Error: {e}")
+        return
+
+    print(f"\n📊 Backfill finished in {time.time() - started:.1f}s")
+    print(f"Channel-days: {stats['shards_done']} analyzed, {stats['shards_skipped']} resumed, "
+          f"{stats['shards_failed']} failed")
+    print(f"Messages: {stats['messages']} ({stats['significant']} significant)")
+    print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
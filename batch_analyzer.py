@@ -3,59 +3,233 @@
 Batch Message Analyzer - Process multiple incident messages for comprehensive analysis
 """
 
+import asyncio
 import json
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 from datetime import datetime
-from message_analyzer import MessageAnalyzer
+from collections import Counter, deque
+from message_analyzer import (MessageAnalyzer, AsyncMessageAnalyzer, DEFAULT_MAX_CONCURRENCY, DEFAULT_BATCH_SIZE,
+                              _error_result)
+from classification_cache import ClassificationCache
+from near_duplicate import NearDuplicateDetector
+
+
+class ConversationAggregate:
+    def __init__(self, max_significant: Optional[int] = None):
+        """
+        Running totals over analyzed messages
+        
+        Args:
+            max_significant: Keep only the most recent significant entries (None keeps all)
+        """
+        self.total_messages = 0
+        self.significant_members = 0
+        self.cluster_count = 0
+        self.significant_count = 0  # every significant cluster, even once significant_messages is capped
+        self.categories = {
+            'diagnostics': 0,
+            'actions': 0,
+            'impact': 0,
+            'resolution': 0
+        }
+        self.significant_messages = deque(maxlen=max_significant)
+        self._cluster_entries = {}  # cluster_id -> significant entry, for the current window only
+    
+    def start_window(self):
+        """Forget cluster lookups once no later message can join those clusters"""
+        self._cluster_entries = {}
+    
+    def add(self, analysis: Dict[str, Any]):
+        """Fold one annotated per-message analysis into the totals"""
+        self.total_messages += 1
+        cluster_id = analysis.get('cluster_id', analysis.get('message_id'))
+        if cluster_id == analysis.get('message_id'):
+            self.cluster_count += 1
+        
+        if not analysis.get('significant'):
+            return
+        
+        # One summary entry per near-duplicate cluster
+        self.significant_members += 1
+        entry = self._cluster_entries.get(cluster_id)
+        if entry is None:
+            self._cluster_entries[cluster_id] = analysis
+            self.significant_messages.append(analysis)
+            self.significant_count += 1
+            category = analysis.get('category')
+            if category in self.categories:
+                self.categories[category] += 1
+        else:
+            entry['cluster_last_timestamp'] = analysis['timestamp']
+            entry['cluster_last_text'] = analysis['original_text']
+    
+    def to_results(self, batch_analyzer: 'BatchMessageAnalyzer', all_results: Optional[List[Dict]] = None) -> Dict[str, Any]:
+        """Build the analyze_conversation result shape from the running totals"""
+        significant_messages = list(self.significant_messages)
+        categories = dict(self.categories)
+        summary = batch_analyzer._generate_batch_summary(all_results or [], significant_messages, categories)
+        
+        results = {
+            'total_messages': self.total_messages,
+            'significant_count': self.significant_count,
+            'categories': categories,
+            'significance_rate': (self.significant_members / self.total_messages) * 100 if self.total_messages else 0,
+            'cluster_count': self.cluster_count,
+            'duplicates_collapsed': self.total_messages - self.cluster_count,
+            'summary': summary,
+            'significant_messages': significant_messages
+        }
+        if all_results is not None:
+            results['all_results'] = all_results
+        return results
+
 
 class BatchMessageAnalyzer:
-    def __init__(self):
-        """Initialize the batch analyzer"""
-        self.analyzer = MessageAnalyzer()
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, rate_limiter: Optional[Any] = None,
+                 cache: Optional[ClassificationCache] = None):
+        """
+        Initialize the batch analyzer
+        
+        Args:
+            max_concurrency: Maximum in-flight model calls for analyze_conversation_async
+            rate_limiter: Optional shared limiter whose acquire() gates every model call
+            cache: Classification cache (defaults to one backed by CLASSIFICATION_CACHE_PATH)
+        """
+        self.analyzer = MessageAnalyzer(cache=cache, rate_limiter=rate_limiter)
+        self.max_concurrency = max_concurrency
+        self._async_analyzer = None  # created on first async use
+        self.duplicate_detector = NearDuplicateDetector()
     
-    def analyze_conversation(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_conversation(self, messages: List[Dict[str, Any]], use_batching: bool = True,
+                             collapse_duplicates: bool = True) -> Dict[str, Any]:
         """
         Analyze a conversation thread of incident messages
         
         Args:
             messages: List of message dicts with keys: 'text', 'timestamp', 'user'
+            use_batching: Classify messages in multi-message prompts instead of one call each
+            collapse_duplicates: Classify each near-duplicate cluster once and apply it to all members
             
         Returns:
             Dict with batch analysis results
         """
-        results = []
-        significant_messages = []
-        actions_taken = []
-        
         print(f"Analyzing {len(messages)} messages...")
         
+        cluster_of, representatives = self._plan_clusters(messages, collapse_duplicates)
+        
+        batched_analyses = {}
+        if use_batching:
+            try:
+                outputs = self.analyzer.analyze_messages([messages[rep]['text'] for rep in representatives])
+                batched_analyses = {representatives[i]: analysis for i, analysis in outputs.items()}
+            except Exception as e:
+                print(f"⚠️ Batched analysis failed, falling back to per-message calls: {e}")
+        
+        return self._compile_results(messages, batched_analyses, cluster_of)
+    
+    async def analyze_conversation_async(self, messages: List[Dict[str, Any]], use_batching: bool = True,
+                                         collapse_duplicates: bool = True) -> Dict[str, Any]:
+        """
+        Analyze a conversation thread with all model calls running concurrently
+        
+        Args:
+            messages: List of message dicts with keys: 'text', 'timestamp', 'user'
+            use_batching: Classify messages in multi-message prompts instead of one call each
+            collapse_duplicates: Classify each near-duplicate cluster once and apply it to all members
+            
+        Returns:
+            Dict with batch analysis results, in the original message order
+        """
+        print(f"Analyzing {len(messages)} messages concurrently...")
+        
+        analyzer = self._get_async_analyzer()
+        cluster_of, representatives = self._plan_clusters(messages, collapse_duplicates)
+        texts = [messages[rep]['text'] for rep in representatives]
+        
+        try:
+            if use_batching:
+                outputs = await analyzer.analyze_messages(texts)
+            else:
+                outputs = dict(enumerate(await asyncio.gather(*[analyzer.analyze_message(text) for text in texts])))
+            analyses = {representatives[i]: analysis for i, analysis in outputs.items()}
+        except Exception as e:
+            print(f"⚠️ Concurrent analysis failed, falling back to per-message calls: {e}")
+            analyses = {}
+        
+        # Fall back through the async per-message path so no sync model call or cache lookup blocks the loop
+        missing = [rep for rep in representatives if rep not in analyses]
+        if missing:
+            fallback = await asyncio.gather(
+                *[analyzer.analyze_message(messages[rep]['text']) for rep in missing], return_exceptions=True
+            )
+            for rep, analysis in zip(missing, fallback):
+                analyses[rep] = _error_result(analysis) if isinstance(analysis, Exception) else analysis
+        
+        return self._compile_results(messages, analyses, cluster_of)
+    
+    def _plan_clusters(self, messages: List[Dict[str, Any]], collapse_duplicates: bool):
+        """
+        Group near-duplicate messages so each cluster is classified once
+        
+        Returns:
+            Tuple of (representative index per message, list of representative indices)
+        """
+        if not collapse_duplicates:
+            cluster_of = list(range(len(messages)))
+        else:
+            cluster_of = self.duplicate_detector.cluster([msg['text'] for msg in messages])
+        
+        representatives = sorted(set(cluster_of))
+        if len(representatives) < len(messages):
+            print(f"🧬 Collapsed {len(messages)} messages into {len(representatives)} near-duplicate clusters")
+        
+        return cluster_of, representatives
+    
+    def _get_async_analyzer(self) -> AsyncMessageAnalyzer:
+        """Create the async analyzer on first use, sharing the sync analyzer's cache"""
+        if self._async_analyzer is None:
+            self._async_analyzer = AsyncMessageAnalyzer(
+                cache=self.analyzer.cache,
+                prefilter=self.analyzer.prefilter,
+                local_classifier=self.analyzer.local_classifier,
+                offline=self.analyzer.offline,
+                cascade=self.analyzer.cascade,
+                rate_limiter=self.analyzer.rate_limiter,
+                max_concurrency=self.max_concurrency
+            )
+        return self._async_analyzer
+    
+    def _compile_results(self, messages: List[Dict[str, Any]], analyses: Dict[int, Dict[str, Any]],
+                         cluster_of: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Attach metadata to per-message analyses and build the batch summary
+        
+        Args:
+            messages: Conversation messages in order
+            analyses: Analyses keyed by cluster representative index
+            cluster_of: Representative index for each message (defaults to one cluster per message)
+        """
+        if cluster_of is None:
+            cluster_of = list(range(len(messages)))
+        cluster_sizes = Counter(cluster_of)
+        
+        results = []
+        aggregate = ConversationAggregate()
+        
         for i, msg in enumerate(messages, 1):
             try:
-                # Analyze individual message
-                analysis = self.analyzer.analyze_message(msg['text'])
-                
-                # Add metadata
-                analysis.update({
-                    'message_id': i,
-                    'timestamp': msg.get('timestamp', ''),
-                    'user': msg.get('user', 'Unknown'),
-                    'original_text': msg['text']
-                })
+                # Reuse the cluster's batched result when available
+                representative = cluster_of[i - 1]
+                analysis = analyses.get(representative)
+                if analysis is None:
+                    analysis = self.analyzer.analyze_message(messages[representative]['text'])
+                    analyses[representative] = analysis
+                analysis = self._annotate(analysis, msg, i, representative + 1, cluster_sizes[representative])
                 
                 results.append(analysis)
-                
-                # Track significant messages
-                if analysis.get('significant'):
-                    significant_messages.append(analysis)
-                    if analysis.get('category') == 'actions':
-                        actions_taken.append(analysis)
-                
-                status_icon = '✅' if analysis.get('significant') else '❌'
-                print(f"  {i:2d}/{len(messages)}: {status_icon} {msg['text'][:50]}...")
-                # Print error reason if analysis failed
-                if not analysis.get('significant') and 'Error analyzing message' in analysis.get('reason', ''):
-                    print(f"       ERROR: {analysis.get('reason')}")
+                aggregate.add(analysis)
+                self._print_progress(i, len(messages), msg, analysis)
                 
             except Exception as e:
                 error_analysis = {
@@ -68,38 +242,96 @@ class BatchMessageAnalyzer:
                     'reason': f"Analysis error: {str(e)}"
                 }
                 results.append(error_analysis)
+                aggregate.add(error_analysis)
         
-        # Categorize messages
-        categories = self._categorize_messages(significant_messages)
+        return aggregate.to_results(self, results)
+    
+    def iter_analyze(self, messages: Iterable[Dict[str, Any]], window_size: int = DEFAULT_BATCH_SIZE,
+                     collapse_duplicates: bool = True, max_significant: Optional[int] = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Stream per-message analyses from any iterable or generator of messages
         
-        # Generate batch summary
-        summary = self._generate_batch_summary(results, significant_messages, categories)
+        Messages are consumed one window at a time, so memory stays bounded by the
+        window size and max_significant no matter how long the input is. Running
+        totals are available in self.last_aggregate while iterating, and the final
+        aggregate (same shape as analyze_conversation, without all_results) is the
+        generator's return value and self.last_aggregate.to_results(self).
         
-        return {
-            'total_messages': len(messages),
-            'significant_count': len(significant_messages),
-            'categories': categories,
-            'significance_rate': (len(significant_messages) / len(messages)) * 100 if messages else 0,
-            'summary': summary,
-            'significant_messages': significant_messages,
-            'all_results': results
-        }
+        Args:
+            messages: Message dicts with keys: 'text', 'timestamp', 'user'
+            window_size: Messages classified together (one batched call per window)
+            collapse_duplicates: Collapse near-duplicates within each window
+            max_significant: Most recent significant entries kept for the final summary
+            
+        Yields:
+            Annotated per-message analysis dicts, in input order
+        """
+        aggregate = ConversationAggregate(max_significant=max_significant)
+        self.last_aggregate = aggregate
+        window = []
+        offset = 0
+        
+        for msg in messages:
+            window.append(msg)
+            if len(window) >= window_size:
+                yield from self._analyze_window(window, offset, aggregate, collapse_duplicates)
+                offset += len(window)
+                window = []
+        
+        if window:
+            yield from self._analyze_window(window, offset, aggregate, collapse_duplicates)
+        
+        return aggregate.to_results(self)
     
-    def _categorize_messages(self, significant_messages: List[Dict]) -> Dict[str, int]:
-        """Categorize significant messages by type"""
-        categories = {
-            'diagnostics': 0,
-            'actions': 0,
-            'impact': 0,
-            'resolution': 0
-        }
+    def _analyze_window(self, window: List[Dict[str, Any]], offset: int, aggregate: ConversationAggregate,
+                        collapse_duplicates: bool) -> Iterator[Dict[str, Any]]:
+        """Classify one window with a single batched pass and yield its annotated results"""
+        aggregate.start_window()
+        cluster_of, representatives = self._plan_clusters(window, collapse_duplicates)
+        cluster_sizes = Counter(cluster_of)
         
-        for msg in significant_messages:
-            category = msg.get('category')
-            if category in categories:
-                categories[category] += 1
+        try:
+            outputs = self.analyzer.analyze_messages([window[rep]['text'] for rep in representatives])
+            analyses = {representatives[i]: analysis for i, analysis in outputs.items()}
+        except Exception as e:
+            print(f"⚠️ Batched analysis failed, falling back to per-message calls: {e}")
+            analyses = {}
         
-        return categories
+        for i, msg in enumerate(window):
+            representative = cluster_of[i]
+            analysis = analyses.get(representative)
+            if analysis is None:
+                try:
+                    analysis = self.analyzer.analyze_message(window[representative]['text'])
+                except Exception as e:
+                    analysis = _error_result(e)  # one bad message must not fail the whole window
+                analyses[representative] = analysis
+            analysis = self._annotate(analysis, msg, offset + i + 1, offset + representative + 1,
+                                      cluster_sizes[representative])
+            aggregate.add(analysis)
+            yield analysis
+    
+    def _annotate(self, analysis: Dict[str, Any], msg: Dict[str, Any], message_id: int, cluster_id: int,
+                  cluster_size: int) -> Dict[str, Any]:
+        """Copy an analysis and attach message metadata"""
+        analysis = dict(analysis)
+        analysis.update({
+            'message_id': message_id,
+            'timestamp': msg.get('timestamp', ''),
+            'user': msg.get('user', 'Unknown'),
+            'original_text': msg['text'],
+            'cluster_id': cluster_id,
+            'cluster_size': cluster_size
+        })
+        return analysis
+    
+    def _print_progress(self, position: int, total: int, msg: Dict[str, Any], analysis: Dict[str, Any]):
+        """Per-message progress line"""
+        status_icon = '✅' if analysis.get('significant') else '❌'
+        print(f"  {position:2d}/{total}: {status_icon} {msg['text'][:50]}...")
+        # Print error reason if analysis failed
+        if not analysis.get('significant') and 'Error analyzing message' in analysis.get('reason', ''):
+            print(f"       ERROR: {analysis.get('reason')}")
     
     def _generate_batch_summary(self, all_results: List[Dict], significant: List[Dict], categories: Dict[str, int]) -> str:
         """Generate a comprehensive summary of the batch analysis"""
@@ -117,6 +349,12 @@ class BatchMessageAnalyzer:
         if category_summary:
             summary_parts.append(f"Activity detected: {', '.join(category_summary)}")
         
+        # Near-duplicate floods are reported as clusters, not individual entries
+        flooded = [msg for msg in significant if msg.get('cluster_size', 1) > 1]
+        if flooded:
+            repeated = sum(msg['cluster_size'] for msg in flooded)
+            summary_parts.append(f"{repeated} near-duplicate messages collapsed into {len(flooded)} clusters")
+        
         # Incident progression
         if len(significant) > 2:
             summary_parts.append(f"Tracked {len(significant)} significant updates showing incident progression")
@@ -212,6 +450,8 @@ def main():
     print(f"Significant messages: {results['significant_count']}")
     print(f"Categories found: {results['categories']}")
     print(f"Significance rate: {results['significance_rate']:.1f}%")
+    prefilter_stats = batch_analyzer.analyzer.prefilter.get_stats()
+    print(f"LLM calls skipped by prefilter: {prefilter_stats['llm_calls_skipped']} ({prefilter_stats['skip_rate']:.1f}%)")
     
     print(f"\n📋 SUMMARY:")
     print(results['summary'])
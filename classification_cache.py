@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Classification Cache - Content-addressed cache for message classifications
+In-memory LRU with TTL in front of a persistent SQLite store
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+CLASSIFICATION_CACHE_PATH = os.getenv('CLASSIFICATION_CACHE_PATH', os.path.join('data', 'classification_cache.db'))
+
+CLASSIFICATION_CACHE_MAX_ROWS = int(os.getenv('CLASSIFICATION_CACHE_MAX_ROWS', '100000'))  # SQLite rows kept (0 = no cap)
+PRUNE_INTERVAL = 3600  # seconds between sweeps of expired and excess rows
+
+
+def normalize_text(text: str) -> str:
+    """Normalize message text so trivially different copies share a cache key"""
+    return _WHITESPACE_RE.sub(' ', text or '').strip().casefold()
+
+
+def make_cache_key(text: str, model: str, prompt_version: str) -> str:
+    """Build the content address for a message under a given model and prompt"""
+    payload = f"{model}\x00{prompt_version}\x00{normalize_text(text)}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ClassificationCache:
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 5000, ttl_seconds: int = 7 * 24 * 3600,
+                 max_disk_entries: int = CLASSIFICATION_CACHE_MAX_ROWS, read_only: bool = False):
+        """
+        Initialize the classification cache
+
+        Args:
+            db_path: SQLite file for persistent entries (None keeps the cache in memory only)
+            max_entries: Maximum number of entries held in the in-memory LRU
+            ttl_seconds: Age after which an entry is treated as a miss
+            max_disk_entries: Newest rows kept in the SQLite store by the periodic prune (0 disables the cap)
+            read_only: Only read the SQLite store (new entries stay in memory), e.g. for parallel workers
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.read_only = read_only
+        self._last_prune = 0.0
+
+        self._memory = OrderedDict()  # key -> (stored_at, result)
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+            'expired': 0,
+            'pruned': 0,
+            'store_errors': 0
+        }
+
+        if db_path:
+            self._open_store(db_path)
+
+    def _open_store(self, db_path: str):
+        """Open (and create if needed) the SQLite store"""
+        if self.read_only:
+            try:
+                uri = pathlib.Path(db_path).absolute().as_uri() + '?mode=ro'
+                self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            except sqlite3.Error as e:
+                print(f"⚠️ Classification cache store unavailable, using memory only: {e}")
+                self._conn = None
+            return
+
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS classifications ("
+                "key TEXT PRIMARY KEY, result TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS classifications_stored_at ON classifications (stored_at)")
+            self._conn.commit()
+        except Exception as e:
+            print(f"⚠️ Classification cache store unavailable, using memory only: {e}")
+            self._conn = None
+            return
+        self.prune()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached classification, returning None on a miss"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, result = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return dict(result)
+                del self._memory[key]
+                self.stats['expired'] += 1
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT result, stored_at FROM classifications WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"⚠️ Classification cache lookup failed: {e}")
+                    self.stats['store_errors'] += 1
+                    row = None
+                if row is not None:
+                    if now - row[1] <= self.ttl_seconds:
+                        result = json.loads(row[0])
+                        self._remember(key, row[1], result)
+                        self.stats['disk_hits'] += 1
+                        return dict(result)
+                    self.stats['expired'] += 1  # removed by the next prune
+
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a classification in memory and on disk"""
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, now, dict(result))
+            self.stats['writes'] += 1
+
+            if self._conn is not None and not self.read_only:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO classifications (key, result, stored_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(result), now)
+                    )
+                    self._conn.commit()
+                except Exception as e:
+                    print(f"⚠️ Failed to persist classification: {e}")
+                    self.stats['store_errors'] += 1
+
+        if now - self._last_prune > PRUNE_INTERVAL:
+            self.prune()
+
+    def prune(self):
+        """Delete expired rows and, past max_disk_entries, the oldest ones from the SQLite store"""
+        with self._lock:
+            self._last_prune = time.time()
+            if self._conn is None or self.read_only:
+                return
+            try:
+                deleted = self._conn.execute(
+                    "DELETE FROM classifications WHERE stored_at < ?", (self._last_prune - self.ttl_seconds,)
+                ).rowcount
+                if self.max_disk_entries:
+                    deleted += self._conn.execute(
+                        "DELETE FROM classifications WHERE key IN ("
+                        "SELECT key FROM classifications ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,)
+                    ).rowcount
+                self._conn.commit()
+                self.stats['pruned'] += deleted
+            except sqlite3.Error as e:
+                print(f"⚠️ Failed to prune classification cache: {e}")
+                self.stats['store_errors'] += 1
+
+    def _remember(self, key: str, stored_at: float, result: Dict[str, Any]):
+        """Insert into the in-memory LRU, evicting the oldest entries past capacity"""
+        self._memory[key] = (stored_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters; every hit is one LLM call saved"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+
+        hits = stats['memory_hits'] + stats['disk_hits']
+        lookups = hits + stats['misses']
+        stats['hits'] = hits
+        stats['llm_calls_saved'] = hits
+        stats['hit_rate'] = (hits / lookups) * 100 if lookups else 0
+        return stats
+
+    def close(self):
+        """Close the SQLite store"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
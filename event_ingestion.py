@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Event Ingestion - Push-based message sources for the Slack bot
+Socket Mode delivers message events as they happen, so API usage no longer grows with
+the number of monitored channels; FakeEventSource replays events locally without Slack
+"""
+
+import json
+import threading
+from typing import Dict, Any, Optional, Callable, Iterable
+
+EventHandler = Callable[[Dict[str, Any]], None]
+
+# Message subtypes that carry conversation content; everything else (joins, topic changes, edits, ...) is skipped.
+# Shared by pushed events, polled history and export backfill so every path ingests the same messages.
+CONTENT_SUBTYPES = {None, 'bot_message', 'thread_broadcast', 'me_message', 'file_share'}
+
+
+class SocketModeEventSource:
+    def __init__(self, app_token: str, web_client=None):
+        """
+        Initialize the Socket Mode source
+
+        Args:
+            app_token: Slack App-Level Token with connections:write (starts with xapp-)
+            web_client: WebClient used by the Socket Mode client for API calls
+        """
+        self.app_token = app_token
+        self.web_client = web_client
+        self.client = None
+        self.stats = {'events_received': 0, 'events_dispatched': 0, 'handler_errors': 0}
+
+    def start(self, handler: EventHandler):
+        """
+        Connect and dispatch every Events API payload to handler
+
+        Args:
+            handler: Called with the inner event dict of each events_api request
+        """
+        # Imported lazily so the bot still runs (polling) without Socket Mode support installed
+        from slack_sdk.socket_mode import SocketModeClient
+        from slack_sdk.socket_mode.response import SocketModeResponse
+
+        def on_request(client, request):
+            # Ack first so Slack does not retry while the message is being processed
+            client.send_socket_mode_response(SocketModeResponse(envelope_id=request.envelope_id))
+            if request.type != 'events_api':
+                return
+
+            self.stats['events_received'] += 1
+            event = (request.payload or {}).get('event')
+            if not event:
+                return
+            try:
+                handler(event)
+                self.stats['events_dispatched'] += 1
+            except Exception as e:
+                self.stats['handler_errors'] += 1
+                print(f"⚠️ Error handling {event.get('type')} event: {e}")
+
+        self.client = SocketModeClient(app_token=self.app_token, web_client=self.web_client)
+        self.client.socket_mode_request_listeners.append(on_request)
+        self.client.connect()
+        print("🔌 Connected to Slack Socket Mode")
+
+    def is_connected(self) -> bool:
+        return self.client is not None and self.client.is_connected()
+
+    def stop(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+
+class FakeEventSource:
+    def __init__(self, events: Optional[Iterable[Dict[str, Any]]] = None):
+        """
+        Initialize a local event source for testing without Slack
+
+        Args:
+            events: Message events (as Slack would send them) replayed when the source starts
+        """
+        self._pending = list(events or [])
+        self._handler = None
+        self._lock = threading.Lock()
+        self.connected = False
+        self.stats = {'events_received': 0, 'events_dispatched': 0, 'handler_errors': 0}
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> 'FakeEventSource':
+        """Load events from a JSONL file (one event dict per line)"""
+        with open(path, 'r') as f:
+            return cls(json.loads(line) for line in f if line.strip())
+
+    def start(self, handler: EventHandler):
+        with self._lock:
+            self._handler = handler
+            self.connected = True
+            pending, self._pending = self._pending, []
+        for event in pending:
+            self._dispatch(event)
+
+    def push(self, event: Dict[str, Any]):
+        """Deliver an event now, or queue it until the source starts"""
+        with self._lock:
+            if self._handler is None:
+                self._pending.append(event)
+                return
+        self._dispatch(event)
+
+    def disconnect(self):
+        """Simulate a dropped connection so the bot falls back to polling"""
+        self.connected = False
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def stop(self):
+        self.connected = False
+        self._handler = None
+
+    def _dispatch(self, event: Dict[str, Any]):
+        self.stats['events_received'] += 1
+        try:
+            self._handler(event)
+            self.stats['events_dispatched'] += 1
+        except Exception as e:
+            self.stats['handler_errors'] += 1
+            print(f"⚠️ Error handling {event.get('type')} event: {e}")
+
+
+def create_event_source(app_token: Optional[str], web_client=None) -> Optional[SocketModeEventSource]:
+    """Socket Mode source for an app token, or None when only polling is available"""
+    if not app_token:
+        return None
+    return SocketModeEventSource(app_token, web_client=web_client)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Incident State - Rolling per-channel incident state
+Each analysis run folds only its new messages in, so summaries cover the whole incident
+at a cost proportional to the new messages
+"""
+
+import os
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+from summary_rules import SummaryRules, get_default_rules
+
+CATEGORIES = ('diagnostics', 'actions', 'impact', 'resolution')
+
+# Most recent significant events (and timeline entries, actions, outcomes) kept per incident
+INCIDENT_MAX_EVENTS = int(os.getenv('INCIDENT_MAX_EVENTS', '500'))
+
+
+class IncidentState:
+    def __init__(self, channel_id: Optional[str] = None, rules: Optional[SummaryRules] = None,
+                 max_events: Optional[int] = INCIDENT_MAX_EVENTS):
+        """
+        Initialize an empty incident state
+
+        Args:
+            channel_id: Channel the incident is tracked in
+            rules: Follow-up, preventive, impact, status and outcome rules (defaults to summary_rules.json)
+            max_events: Keep only the most recent significant events per section (None keeps all);
+                category counts and significant_count still cover the whole incident
+        """
+        self.channel_id = channel_id
+        self.rules = rules if rules is not None else get_default_rules()
+        self.started_at = datetime.now()
+        self.updated_at = None
+        self.analyses_run = 0
+
+        self.max_events = max_events
+        self.total_messages = 0
+        self.significant_count = 0
+        self.categories = {category: 0 for category in CATEGORIES}
+        self.significant_messages = deque(maxlen=max_events)
+        self.timeline = deque(maxlen=max_events)
+        self.completed_actions = deque(maxlen=max_events)
+        self.follow_ups = []  # bounded by the number of rules
+        self.preventive_items = []
+        self.outcomes = deque(maxlen=max_events)
+        self.business_impact = deque(maxlen=max_events)
+
+        self._seen_actions = OrderedDict()  # completed action descriptions, oldest first
+        self._suggested = set()  # follow-up / preventive rules already fired
+        self._resolution_status = None  # status set by the latest resolution message
+        self._impact = {
+            'severity': 'unknown',
+            'scope': 'unknown',
+            'customer_impact': 'unknown',
+            'duration': 'unknown',
+            'services_affected': []
+        }
+
+    def fold(self, analysis_results: Dict[str, Any]):
+        """
+        Fold one BatchMessageAnalyzer result (new messages only) into the state
+
+        Message and cluster IDs are shifted so they stay unique across runs.
+
+        Args:
+            analysis_results: Results from BatchMessageAnalyzer.analyze_conversation
+        """
+        offset = self.total_messages
+        for msg in analysis_results.get('significant_messages', []):
+            msg = dict(msg)
+            msg['message_id'] = msg.get('message_id', 0) + offset
+            if 'cluster_id' in msg:
+                msg['cluster_id'] += offset
+            self.add_significant(msg)
+
+        self.total_messages += analysis_results.get('total_messages', 0)
+        self.analyses_run += 1
+        self.updated_at = datetime.now()
+
+    def add_significant(self, msg: Dict[str, Any]):
+        """Update every summary section with one significant message"""
+        category = msg.get('category')
+        text = msg.get('original_text', '')
+
+        self.significant_messages.append(msg)
+        self.significant_count += 1
+        if category in self.categories:
+            self.categories[category] += 1
+
+        self.timeline.append({
+            'timestamp': msg.get('timestamp', ''),
+            'user': msg.get('user', 'Unknown'),
+            'category': (category or '').upper(),
+            'event': text,
+            'significance': msg.get('reason', ''),
+            'message_id': msg.get('message_id', 0),
+            'occurrences': msg.get('cluster_size', 1)
+        })
+
+        if category == 'actions':
+            self._add_completed_action(msg)
+        if category == 'resolution':
+            self._resolution_status = None
+
+        for hit in self.rules.evaluate(category, text, msg.get('reason') or ''):
+            kind = hit['kind']
+            if kind in ('follow_up', 'preventive'):
+                self._add_suggestion(hit, msg)
+            elif kind == 'severity':
+                self._impact['severity'] = hit['value']
+            elif kind == 'customer_impact':
+                self._impact['customer_impact'] = hit['value']
+            elif kind == 'status':
+                self._resolution_status = hit['value']
+            elif kind == 'outcome':
+                self.outcomes.append(hit['value'])
+            elif kind == 'business_impact':
+                self.business_impact.append(hit['value'])
+
+    def _add_completed_action(self, msg: Dict[str, Any]):
+        description = msg.get('original_text', '')
+        if description in self._seen_actions:
+            return
+        self._seen_actions[description] = None
+        if self.max_events is not None and len(self._seen_actions) > self.max_events:
+            self._seen_actions.popitem(last=False)
+        self.completed_actions.append({
+            'type': 'completed_action',
+            'description': description,
+            'timestamp': msg.get('timestamp', ''),
+            'user': msg.get('user', ''),
+            'status': 'completed'
+        })
+
+    def _add_suggestion(self, hit: Dict[str, Any], msg: Dict[str, Any]):
+        if hit['name'] in self._suggested:
+            return
+        self._suggested.add(hit['name'])
+        if hit['kind'] == 'follow_up':
+            self.follow_ups.append({
+                'type': 'follow_up',
+                'description': hit['value'],
+                'timestamp': msg.get('timestamp', ''),
+                'status': 'pending'
+            })
+        else:
+            self.preventive_items.append({
+                'type': 'preventive',
+                'description': hit['value'],
+                'status': 'suggested'
+            })
+
+    @property
+    def action_items(self) -> List[Dict[str, Any]]:
+        """Completed actions, then follow-ups, then preventive suggestions"""
+        return list(self.completed_actions) + self.follow_ups + self.preventive_items
+
+    @property
+    def status(self) -> str:
+        """Current incident status"""
+        if not self.significant_messages:
+            return "No Activity"
+
+        if self._resolution_status:
+            return self._resolution_status
+
+        if self.categories['actions']:
+            return "Active Response"
+        if self.categories['diagnostics']:
+            return "Under Investigation"
+        return "Active"
+
+    def impact_assessment(self) -> Dict[str, Any]:
+        """Impact assessment, inferred from other categories when no impact was reported"""
+        assessment = dict(self._impact, services_affected=list(self._impact['services_affected']))
+        if not self.categories['impact']:
+            if self.categories['actions'] > 2:
+                assessment['severity'] = 'medium'
+                assessment['scope'] = 'service-level'
+            if self.categories['resolution'] > 0:
+                assessment['duration'] = 'resolved'
+        return assessment
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+LLM Governor - Process-wide concurrency, requests-per-minute and tokens-per-minute limits
+for every model call, with waiting calls served in priority order
+"""
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv('LLM_REQUESTS_PER_MINUTE', '0'))  # 0 disables the limit
+LLM_TOKENS_PER_MINUTE = float(os.getenv('LLM_TOKENS_PER_MINUTE', '0'))  # 0 disables the limit
+
+# Lower values are served first
+PRIORITY_URGENT = 0  # active impact / outage, or a channel in Active Response
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2  # chatter-only channels, and backfill workers (each worker process has its own governor)
+PRIORITY_NAMES = {PRIORITY_URGENT: 'urgent', PRIORITY_NORMAL: 'normal', PRIORITY_LOW: 'low'}
+
+_current_priority = contextvars.ContextVar('llm_priority', default=PRIORITY_NORMAL)
+
+
+@contextlib.contextmanager
+def llm_priority(priority: int):
+    """Run model calls made in this context (and threads started with its copy) at a priority"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+def estimate_tokens(prompt: str, max_tokens: int, extra_chars: int = 0) -> int:
+    """Rough upper bound for one call: prompt at about four characters per token plus the output budget"""
+    return (len(prompt) + extra_chars) // 4 + 1 + max_tokens
+
+
+def response_tokens(response: Any) -> Optional[int]:
+    """Tokens a Messages API response actually used, or None when it carries no usage"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return None
+    return sum(getattr(usage, field, None) or 0 for field in (
+        'input_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens', 'output_tokens'
+    ))
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until amount is available (amount is clipped to capacity so huge calls still pass)"""
+        deficit = min(amount, self.capacity) - self.level
+        return deficit / self.rate if deficit > 0 else 0.0
+
+
+class LLMGovernor:
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = LLM_TOKENS_PER_MINUTE):
+        """
+        Initialize the governor
+
+        Args:
+            max_concurrency: Model calls in flight at once across the process
+            requests_per_minute: Request quota (0 disables it)
+            tokens_per_minute: Token quota, charged with an estimate up front and corrected afterwards (0 disables it)
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self._requests = _TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._condition = threading.Condition()
+        self._waiting = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self.stats = {'granted': 0, 'throttled': 0, 'max_queue_depth': 0}
+        self._wait_stats = {name: {'granted': 0, 'total_wait': 0.0, 'max_wait': 0.0} for name in PRIORITY_NAMES.values()}
+
+    def acquire(self, estimated_tokens: int = 0, priority: Optional[int] = None) -> int:
+        """
+        Block until a model call may start
+
+        Args:
+            estimated_tokens: Expected tokens for the call (charged against the token quota)
+            priority: PRIORITY_* value (defaults to the current llm_priority context)
+
+        Returns:
+            The tokens charged, to pass back to release()
+        """
+        priority = current_priority() if priority is None else priority
+        entry = (priority, next(self._sequence))
+        started = time.monotonic()
+
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], len(self._waiting))
+            throttled = False
+            while True:
+                now = time.monotonic()
+                wait = self._blocked_for(entry, estimated_tokens, now)
+                if wait == 0:
+                    break
+                throttled = True
+                self._condition.wait(None if wait < 0 else min(wait, 1.0))
+
+            heapq.heappop(self._waiting)
+            self._in_flight += 1
+            if self._requests is not None:
+                self._requests.level -= 1
+            if self._tokens is not None:
+                self._tokens.level -= estimated_tokens
+            self._record_wait(priority, time.monotonic() - started, throttled)
+            self._condition.notify_all()  # the next waiter may be able to go too
+        return estimated_tokens
+
+    def release(self, charged_tokens: int = 0, actual_tokens: Optional[int] = None):
+        """
+        Finish a model call
+
+        Args:
+            charged_tokens: Value returned by acquire()
+            actual_tokens: Tokens the call really used, to correct the estimate
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if self._tokens is not None and actual_tokens is not None:
+                self._tokens.level += charged_tokens - actual_tokens
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, estimated_tokens: int = 0, priority: Optional[int] = None):
+        """
+        Hold a call slot for the duration of the block
+
+        Set `usage['actual_tokens']` on the yielded dict to correct the token estimate.
+        """
+        charged = self.acquire(estimated_tokens, priority)
+        usage = {'actual_tokens': None}
+        try:
+            yield usage
+        finally:
+            self.release(charged, usage['actual_tokens'])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight calls, remaining quota and wait times per priority"""
+        with self._condition:
+            now = time.monotonic()
+            stats = dict(self.stats, queue_depth=len(self._waiting), in_flight=self._in_flight)
+            for name, bucket in (('requests_available', self._requests), ('tokens_available', self._tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    stats[name] = int(bucket.level)
+            stats['wait_by_priority'] = {
+                name: {
+                    'granted': wait['granted'],
+                    'avg_wait_seconds': round(wait['total_wait'] / wait['granted'], 3) if wait['granted'] else 0.0,
+                    'max_wait_seconds': round(wait['max_wait'], 3)
+                }
+                for name, wait in self._wait_stats.items()
+            }
+        return stats
+
+    def _blocked_for(self, entry, estimated_tokens: int, now: float) -> float:
+        """0 when entry may go now, seconds until a quota refills, or -1 to wait for a release or a higher-priority call"""
+        if self._waiting[0] != entry or self._in_flight >= self.max_concurrency:
+            return -1
+        wait = 0.0
+        for bucket, amount in ((self._requests, 1), (self._tokens, estimated_tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_for(amount))
+        return wait
+
+    def _record_wait(self, priority: int, waited: float, throttled: bool):
+        self.stats['granted'] += 1
+        if throttled:
+            self.stats['throttled'] += 1
+        wait = self._wait_stats[PRIORITY_NAMES.get(priority, 'normal')]
+        wait['granted'] += 1
+        wait['total_wait'] += waited
+        wait['max_wait'] = max(wait['max_wait'], waited)
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> LLMGovernor:
+    """Process-wide governor shared by every component that calls the model"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = LLMGovernor()
+        return _governor
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Local Classifier - Offline TF-IDF + logistic regression significance classifier
+Trained on labelled history saved by batch_analyzer.py / IncidentSlackBot._save_analysis_results
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import random
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+from near_duplicate import mask_variable_tokens
+
+# Label used for non-significant messages
+NONE_LABEL = 'none'
+LABELS = [NONE_LABEL, 'diagnostics', 'actions', 'impact', 'resolution']
+
+MODEL_VERSION = 1
+DEFAULT_MODEL_PATH = os.getenv('LOCAL_CLASSIFIER_PATH', 'local_classifier_model.json')
+
+# Reasons that mark results which are not real model labels
+_UNLABELLED_REASON_PREFIXES = ('Error analyzing message', 'Analysis error', 'Prefilter:', 'Local classifier:')
+
+
+def extract_features(text: str) -> Counter:
+    """Word unigrams and bigrams over the masked, lowercased text"""
+    tokens = mask_variable_tokens(text).split()
+    features = Counter(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return features
+
+
+def load_labelled_examples(paths: List[str]) -> List[Tuple[str, str]]:
+    """
+    Load (text, label) pairs from saved analysis files
+
+    Accepts BatchMessageAnalyzer output ('all_results') and saved comprehensive
+    summaries ('all_results' or, failing that, the significant-only 'technical_timeline').
+    """
+    examples = []
+    for path in paths:
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Skipping {path}: {e}")
+            continue
+
+        if data.get('all_results'):
+            for result in data['all_results']:
+                text = result.get('original_text')
+                reason = result.get('reason') or ''
+                if not text or reason.startswith(_UNLABELLED_REASON_PREFIXES):
+                    continue
+                label = result.get('category') if result.get('significant') else NONE_LABEL
+                if label in LABELS:
+                    examples.append((text, label))
+        else:
+            for event in data.get('technical_timeline', []):
+                label = (event.get('category') or '').lower()
+                if event.get('event') and label in LABELS:
+                    examples.append((event['event'], label))
+
+    return examples
+
+
+class LocalClassifier:
+    def __init__(self):
+        """Initialize an untrained classifier"""
+        self.idf: Dict[str, float] = {}
+        self.weights: Dict[str, List[float]] = {}  # feature -> one weight per label
+        self.bias: List[float] = [0.0] * len(LABELS)
+        self.trained_examples = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.weights)
+
+    def _vectorize(self, text: str) -> Dict[str, float]:
+        """Sublinear TF-IDF vector, L2-normalized, restricted to known features"""
+        vector = {}
+        for feature, count in extract_features(text).items():
+            idf = self.idf.get(feature)
+            if idf is not None:
+                vector[feature] = (1 + math.log(count)) * idf
+
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        if norm:
+            for feature in vector:
+                vector[feature] /= norm
+        return vector
+
+    def _probabilities(self, vector: Dict[str, float]) -> List[float]:
+        """Softmax over label scores"""
+        scores = list(self.bias)
+        for feature, value in vector.items():
+            row = self.weights.get(feature)
+            if row is not None:
+                for label_index in range(len(LABELS)):
+                    scores[label_index] += row[label_index] * value
+
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def train(self, examples: List[Tuple[str, str]], epochs: int = 30, learning_rate: float = 0.5,
+              l2: float = 1e-4, min_df: int = 1, seed: int = 13):
+        """
+        Fit TF-IDF statistics and a multinomial logistic regression with SGD
+
+        Args:
+            examples: (text, label) pairs; labels must be in LABELS
+            epochs: Passes over the training data
+            learning_rate: Initial SGD step size (decays per epoch)
+            l2: L2 regularization strength
+            min_df: Minimum document frequency for a feature to be kept
+            seed: Shuffle seed for reproducible models
+        """
+        examples = [(text, label) for text, label in examples if label in LABELS]
+        if not examples:
+            raise ValueError("No labelled examples to train on")
+
+        document_frequency = Counter()
+        for text, _ in examples:
+            document_frequency.update(extract_features(text).keys())
+
+        total = len(examples)
+        self.idf = {
+            feature: math.log((1 + total) / (1 + df)) + 1
+            for feature, df in document_frequency.items()
+            if df >= min_df
+        }
+        self.weights = {feature: [0.0] * len(LABELS) for feature in self.idf}
+        self.bias = [0.0] * len(LABELS)
+
+        vectors = [(self._vectorize(text), LABELS.index(label)) for text, label in examples]
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(vectors)
+            step = learning_rate / (1 + epoch * 0.1)
+            for vector, target in vectors:
+                probabilities = self._probabilities(vector)
+                gradients = [p - (1.0 if i == target else 0.0) for i, p in enumerate(probabilities)]
+                for i, gradient in enumerate(gradients):
+                    self.bias[i] -= step * gradient
+                for feature, value in vector.items():
+                    row = self.weights[feature]
+                    for i, gradient in enumerate(gradients):
+                        row[i] -= step * (gradient * value + l2 * row[i])
+
+        self.trained_examples = total
+
+    def predict(self, text: str) -> Dict[str, Any]:
+        """
+        Classify a message
+
+        Returns:
+            Analysis dict (significant, category, reason) plus a 'confidence' score in [0, 1]
+        """
+        if not self.is_trained:
+            return {
+                "significant": False,
+                "category": None,
+                "reason": "Local classifier: no trained model",
+                "confidence": 0.0
+            }
+
+        probabilities = self._probabilities(self._vectorize(text))
+        best = max(range(len(LABELS)), key=lambda i: probabilities[i])
+        label = LABELS[best]
+        confidence = probabilities[best]
+
+        return {
+            "significant": label != NONE_LABEL,
+            "category": None if label == NONE_LABEL else label,
+            "reason": f"Local classifier: {label} ({confidence:.0%} confidence)",
+            "confidence": confidence
+        }
+
+    def evaluate(self, examples: List[Tuple[str, str]], threshold: float = 0.0) -> Dict[str, Any]:
+        """Accuracy and coverage of predictions at or above a confidence threshold"""
+        covered = correct = 0
+        for text, label in examples:
+            prediction = self.predict(text)
+            if prediction['confidence'] < threshold:
+                continue
+            covered += 1
+            predicted = prediction['category'] or NONE_LABEL
+            correct += predicted == label
+
+        return {
+            'examples': len(examples),
+            'covered': covered,
+            'coverage': (covered / len(examples)) * 100 if examples else 0,
+            'accuracy': (correct / covered) * 100 if covered else 0
+        }
+
+    def save(self, path: str):
+        """Write the model as JSON"""
+        with open(path, 'w') as f:
+            json.dump({
+                'version': MODEL_VERSION,
+                'labels': LABELS,
+                'trained_examples': self.trained_examples,
+                'idf': self.idf,
+                'weights': self.weights,
+                'bias': self.bias
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> 'LocalClassifier':
+        """Read a model written by save()"""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != MODEL_VERSION or data.get('labels') != LABELS:
+            raise ValueError(f"Incompatible local classifier model: {path}")
+
+        classifier = cls()
+        classifier.idf = data['idf']
+        classifier.weights = data['weights']
+        classifier.bias = data['bias']
+        classifier.trained_examples = data.get('trained_examples', 0)
+        return classifier
+
+
+def load_default_classifier() -> Optional[LocalClassifier]:
+    """Load the model at LOCAL_CLASSIFIER_PATH if one has been trained"""
+    if not DEFAULT_MODEL_PATH or not os.path.exists(DEFAULT_MODEL_PATH):
+        return None
+    try:
+        return LocalClassifier.load(DEFAULT_MODEL_PATH)
+    except Exception as e:
+        print(f"⚠️ Could not load local classifier: {e}")
+        return None
+
+
+def main():
+    """Train or evaluate the local classifier from saved analysis files"""
+    parser = argparse.ArgumentParser(description="Train the offline local classifier")
+    parser.add_argument('files', nargs='*', default=['incident_analysis.json', 'analysis_*.json'],
+                        help="Saved analysis JSON files (glob patterns allowed)")
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH, help="Where to write the trained model")
+    parser.add_argument('--threshold', type=float, default=0.85, help="Confidence threshold to report coverage at")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.files for path in glob.glob(pattern)})
+    examples = load_labelled_examples(paths)
+    print(f"Loaded {len(examples)} labelled examples from {len(paths)} files")
+    if not examples:
+        print("Error: no labelled examples found")
+        return
+
+    classifier = LocalClassifier()
+    classifier.train(examples)
+    classifier.save(args.output)
+
+    stats = classifier.evaluate(examples, threshold=args.threshold)
+    print(f"Training accuracy at {args.threshold:.2f} confidence: {stats['accuracy']:.1f}% "
+          f"({stats['coverage']:.1f}% coverage)")
+    print(f"💾 Model saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
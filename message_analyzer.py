@@ -4,19 +4,341 @@ Simple Claude SDK Message Analyzer
 Analyzes incident messages for significance detection
 """
 
+import asyncio
 import json
 import os
-from typing import Dict, Any
-from anthropic import AnthropicVertex
+import time
+from typing import Dict, Any, List, Optional
+from classification_cache import ClassificationCache, CLASSIFICATION_CACHE_PATH, make_cache_key
+from message_prefilter import MessagePrefilter
+from local_classifier import LocalClassifier, load_default_classifier
+from model_cascade import CascadeTier, ModelCascade, LOCAL_TIER, get_default_cascade
+from token_usage import usage_tracker
+from llm_governor import get_governor, current_priority, estimate_tokens, response_tokens
+from vertex_client import get_vertex_client, get_async_vertex_client
 
+# Bump whenever the classification prompt changes so stale cache entries are ignored
+PROMPT_VERSION = "3"
 
-class MessageAnalyzer:
-    def __init__(self, project_id: str = None, region: str = None):
-        """Initialize the Claude SDK client for Vertex AI"""
-        self.client = AnthropicVertex(
-            project_id=project_id or os.getenv('ANTHROPIC_VERTEX_PROJECT_ID'),
-            region=region or os.getenv('ANTHROPIC_VERTEX_REGION', 'us-east5')
+# Fixed classification instructions, sent as the system prompt so that only the
+# message text varies from call to call
+CLASSIFICATION_SYSTEM_PROMPT = """You analyze incident channel messages for significance across multiple categories.
+
+Determine if each message indicates significant incident activity in any of these categories:
+
+**Category 1: Diagnostics & Root Cause Analysis**
+- Specific error messages or patterns identified
+- Root cause discoveries or correlations established
+- Component or service implicated with evidence
+- Diagnostic tests revealing critical information
+- Hypotheses confirmed or refuted with data
+
+**Category 2: Actions & Remediation Efforts**
+- Rollbacks, reversions, deployments
+- Service restarts, scaling, configuration changes
+- Node/pod management (cordon, drain, restart)
+- Workarounds implemented
+- Escalations to external teams
+
+**Category 3: Impact & Scope Changes**
+- Number of affected users/services/nodes changing
+- Severity level changes (degraded → unavailable)
+- Geographic or environment scope changes
+- New symptoms or unexpected behaviors appearing
+- Incident containment status updates
+
+**Category 4: Resolution & Milestones**
+- Incident officially declared resolved
+- Post-mortem or RCA scheduled/started
+- Follow-up actions identified for prevention
+- Monitoring confirms stability
+- Final status updates and closures
+
+**Ignore these (Non-significant):**
+- General chatter, greetings, thanks
+- Pure speculation without evidence
+- Redundant confirmations of known facts
+- Vague statements without specifics
+- Simple status inquiries without answers
+
+Also report how confident you are in each classification, from 0.0 (guessing) to 1.0 (certain).
+
+When given a single message, respond with JSON only:
+{
+    "significant": true/false,
+    "category": "diagnostics|actions|impact|resolution|null",
+    "reason": "brief explanation of significance and which category applies",
+    "confidence": 0.0-1.0
+}
+
+When given numbered messages, analyze each one independently and respond with a JSON array only,
+one object per message, in the same order:
+[
+    {
+        "index": <message number>,
+        "significant": true/false,
+        "category": "diagnostics|actions|impact|resolution|null",
+        "reason": "brief explanation of significance and which category applies",
+        "confidence": 0.0-1.0
+    }
+]"""
+
+# Built once at import. Not marked for prompt caching: at roughly 600 tokens the rubric
+# is below the provider's minimum cacheable prefix, so cache_control would have no effect
+SYSTEM_BLOCKS = [
+    {
+        "type": "text",
+        "text": CLASSIFICATION_SYSTEM_PROMPT
+    }
+]
+
+VALID_CATEGORIES = {'diagnostics', 'actions', 'impact', 'resolution'}
+
+# Number of messages packed into a single batched classification prompt
+DEFAULT_BATCH_SIZE = 20
+
+# Maximum number of in-flight model calls for AsyncMessageAnalyzer
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('ANALYZER_MAX_CONCURRENCY', '8'))
+
+# Never call the model; answer every message with the local tiers
+ANALYZER_OFFLINE = os.getenv('ANALYZER_OFFLINE', 'false').lower() == 'true'
+
+
+def _build_message_prompt(message: str) -> str:
+    """Build the per-call part of the single-message prompt"""
+    return f'Message: "{message}"'
+
+
+def _build_batch_prompt(messages: List[str]) -> str:
+    """Build the per-call part of the multi-message prompt"""
+    numbered = "\n".join(
+        f"[{i}] {json.dumps(message)}" for i, message in enumerate(messages)
+    )
+    return f"Messages:\n{numbered}"
+
+
+def _error_result(error: Exception) -> Dict[str, Any]:
+    """Non-significant result used when a message could not be analyzed"""
+    return {
+        "significant": False,
+        "category": None,
+        "reason": f"Error analyzing message: {str(error)}",
+        "tier": None
+    }
+
+
+def _default_prefilter() -> MessagePrefilter:
+    """Prefilter configured from MESSAGE_PREFILTER_ENABLED / MESSAGE_PREFILTER_DECIDE_CATEGORIES"""
+    return MessagePrefilter(
+        enabled=os.getenv('MESSAGE_PREFILTER_ENABLED', 'true').lower() != 'false',
+        decide_categories=os.getenv('MESSAGE_PREFILTER_DECIDE_CATEGORIES', 'false').lower() == 'true'
+    )
+
+
+def _validate_entry(entry: Any) -> Optional[Dict[str, Any]]:
+    """Normalize one classification object, or None if it is malformed"""
+    if not isinstance(entry, dict) or not isinstance(entry.get('significant'), bool):
+        return None
+
+    category = entry.get('category')
+    if category in ('null', ''):
+        category = None
+    if category is not None and category not in VALID_CATEGORIES:
+        return None
+
+    confidence = entry.get('confidence')
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or not 0 <= confidence <= 1:
+        confidence = None
+
+    return {
+        "significant": entry['significant'],
+        "category": category,
+        "reason": str(entry.get('reason', '')),
+        "confidence": confidence
+    }
+
+
+def _validate_batch_output(parsed: Any, expected: int) -> Dict[int, Dict[str, Any]]:
+    """Keep only well-formed, in-range, non-duplicate entries from a batched response"""
+    if not isinstance(parsed, list):
+        return {}
+
+    valid = {}
+    for entry in parsed:
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get('index')
+        if not isinstance(index, int) or isinstance(index, bool):
+            continue
+        if index < 0 or index >= expected or index in valid:
+            continue
+        result = _validate_entry(entry)
+        if result is not None:
+            valid[index] = result
+
+    return valid
+
+
+def _chunk(groups: List, batch_size: int) -> List[List]:
+    """Split message groups into prompt-sized batches"""
+    return [groups[start:start + batch_size] for start in range(0, len(groups), batch_size)]
+
+
+class _BaseMessageAnalyzer:
+    def __init__(self, project_id: str = None, region: str = None, cache: Optional[ClassificationCache] = None,
+                 prefilter: Optional[MessagePrefilter] = None, local_classifier: Optional[LocalClassifier] = None,
+                 offline: bool = ANALYZER_OFFLINE, cascade: Optional[ModelCascade] = None,
+                 rate_limiter: Optional[Any] = None):
+        """
+        Initialize the analyzer (the Vertex client is shared and created lazily)
+        
+        Args:
+            project_id: GCP project ID (defaults to ANTHROPIC_VERTEX_PROJECT_ID)
+            region: Vertex AI region (defaults to ANTHROPIC_VERTEX_REGION)
+            cache: Classification cache (defaults to one backed by CLASSIFICATION_CACHE_PATH)
+            prefilter: Local keyword tier consulted before the cache and the model
+            local_classifier: Trained offline classifier (defaults to the model at LOCAL_CLASSIFIER_PATH)
+            offline: Answer every message locally without calling the model
+            cascade: Tiers, thresholds and budgets (defaults to the process-wide cascade)
+            rate_limiter: Optional object whose blocking acquire() is called before every model call
+        """
+        self.project_id = project_id
+        self.region = region
+        self.cascade = cascade if cascade is not None else get_default_cascade()
+        self.cache = cache if cache is not None else ClassificationCache(
+            db_path=CLASSIFICATION_CACHE_PATH
         )
+        self.prefilter = prefilter if prefilter is not None else _default_prefilter()
+        self.local_classifier = local_classifier if local_classifier is not None else load_default_classifier()
+        self.offline = offline
+        self.rate_limiter = rate_limiter
+        self.local_stats = {'answered': 0, 'deferred': 0, 'outage_fallbacks': 0}
+    
+    @property
+    def model(self) -> str:
+        """Entry model of the cascade"""
+        return self.cascade.model_tiers[0].model
+    
+    def _cache_key(self, message: str) -> str:
+        """Content address of a message under the current cascade and prompt"""
+        return make_cache_key(message, self.cascade.signature, PROMPT_VERSION)
+    
+    def _answer_locally(self, message: str) -> Optional[Dict[str, Any]]:
+        """Try the prefilter, then the local classifier tier; None means a model tier must decide"""
+        local = self.prefilter.evaluate(message)
+        if local is not None:
+            return local
+        
+        if self.local_classifier is not None and self.local_classifier.is_trained:
+            prediction = self.local_classifier.predict(message)
+            prediction['tier'] = LOCAL_TIER
+            local_tier = self.cascade.local_tier
+            if self.offline or (local_tier is not None and prediction['confidence'] >= local_tier.threshold):
+                self.local_stats['answered'] += 1
+                if local_tier is not None:
+                    local_tier.record('answered')
+                return prediction
+            self.local_stats['deferred'] += 1
+            if local_tier is not None:
+                local_tier.record('escalated')
+        elif self.offline:
+            return _error_result(RuntimeError("offline mode without a trained local classifier"))
+        
+        return None
+    
+    def _fallback_result(self, message: str, error: Exception) -> Dict[str, Any]:
+        """Result used when no model tier answered: the local prediction if available, else an error"""
+        if self.local_classifier is not None and self.local_classifier.is_trained:
+            self.local_stats['outage_fallbacks'] += 1
+            prediction = self.local_classifier.predict(message)
+            prediction['reason'] += f" (model unavailable: {str(error)[:80]})"
+            prediction['tier'] = LOCAL_TIER
+            return prediction
+        return _error_result(error)
+    
+    def _partition_pending(self, messages: List[str]):
+        """
+        Split messages into locally answered results and groups of identical messages needing the model
+        
+        Returns:
+            Tuple of (index -> local/cached result, cache key -> indices still needing a model call)
+        """
+        results = {}
+        pending = {}
+        
+        for index, message in enumerate(messages):
+            local = self._answer_locally(message)
+            if local is not None:
+                results[index] = local
+                continue
+            key = self._cache_key(message)
+            if key in pending:
+                pending[key].append(index)
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending[key] = [index]
+        
+        return results, pending
+    
+    def _settle_tier(self, tier: CascadeTier, groups: List, outputs: Dict[str, Dict[str, Any]],
+                     best: Dict[str, Dict[str, Any]]) -> List:
+        """
+        Record one tier's answers and pick the groups that move up the cascade
+        
+        Returns:
+            Groups that are unanswered or below the tier's confidence threshold
+        """
+        escalate = []
+        for key, indices in groups:
+            result = outputs.get(key)
+            if result is None:
+                # Call failed or budget exhausted; keep any lower-tier answer
+                if key not in best:
+                    escalate.append((key, indices))
+                continue
+            
+            result['tier'] = tier.name
+            best[key] = result
+            if self.cascade.is_confident(tier, result):
+                tier.record('answered')
+            else:
+                tier.record('escalated')
+                escalate.append((key, indices))
+        
+        return escalate
+    
+    def _store_results(self, messages: List[str], pending: Dict[str, List[int]], best: Dict[str, Dict[str, Any]],
+                       results: Dict[int, Dict[str, Any]], last_error: Optional[Exception]):
+        """Cache final answers and fan them out to every identical message"""
+        for key, indices in pending.items():
+            result = best.get(key)
+            if result is None:
+                result = self._fallback_result(
+                    messages[indices[0]], last_error or RuntimeError("all model tier budgets exhausted")
+                )
+            else:
+                self.cache.put(key, result)
+            for index in indices:
+                results[index] = dict(result)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for every tier, including those that answer without a model call"""
+        return {
+            'prefilter': self.prefilter.get_stats(),
+            'local_classifier': dict(self.local_stats),
+            'cache': self.cache.get_stats(),
+            'cascade': self.cascade.get_stats()
+        }
+
+
+class MessageAnalyzer(_BaseMessageAnalyzer):
+    @property
+    def client(self):
+        """Shared Vertex client, created on first model call"""
+        return get_vertex_client(self.project_id, self.region)
     
     def analyze_message(self, message: str) -> Dict[str, Any]:
         """
@@ -26,77 +348,267 @@ class MessageAnalyzer:
             message: The incident message to analyze
             
         Returns:
-            Dict with significance, category, and reason
-        """
-        prompt = f"""
-        Analyze this incident message for significance across multiple categories:
-        
-        Message: "{message}"
-        
-        Determine if this message indicates significant incident activity in any of these categories:
-        
-        **Category 1: Diagnostics & Root Cause Analysis**
-        - Specific error messages or patterns identified
-        - Root cause discoveries or correlations established
-        - Component or service implicated with evidence
-        - Diagnostic tests revealing critical information
-        - Hypotheses confirmed or refuted with data
-        
-        **Category 2: Actions & Remediation Efforts**
-        - Rollbacks, reversions, deployments
-        - Service restarts, scaling, configuration changes
-        - Node/pod management (cordon, drain, restart)
-        - Workarounds implemented
-        - Escalations to external teams
-        
-        **Category 3: Impact & Scope Changes**
-        - Number of affected users/services/nodes changing
-        - Severity level changes (degraded → unavailable)
-        - Geographic or environment scope changes
-        - New symptoms or unexpected behaviors appearing
-        - Incident containment status updates
-        
-        **Category 4: Resolution & Milestones**
-        - Incident officially declared resolved
-        - Post-mortem or RCA scheduled/started
-        - Follow-up actions identified for prevention
-        - Monitoring confirms stability
-        - Final status updates and closures
-        
-        **Ignore these (Non-significant):**
-        - General chatter, greetings, thanks
-        - Pure speculation without evidence
-        - Redundant confirmations of known facts
-        - Vague statements without specifics
-        - Simple status inquiries without answers
-        
-        Respond with JSON only:
-        {{
-            "significant": true/false,
-            "category": "diagnostics|actions|impact|resolution|null",
-            "reason": "brief explanation of significance and which category applies"
-        }}
-        """
-        
-        try:
+            Dict with significance, category, reason, confidence and the tier that answered
+        """
+        local = self._answer_locally(message)
+        if local is not None:
+            return local
+        
+        cached = self.cache.get(self._cache_key(message))
+        if cached is not None:
+            return cached
+        
+        return self._request_classification(message)
+    
+    def _request_classification(self, message: str) -> Dict[str, Any]:
+        """Classify a single message through the model tiers and cache the final answer"""
+        results = {}
+        self._run_cascade([message], {self._cache_key(message): [0]}, results, DEFAULT_BATCH_SIZE)
+        return results[0]
+    
+    def analyze_messages(self, messages: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[int, Dict[str, Any]]:
+        """
+        Analyze many incident messages with one model call per batch and tier
+        
+        Args:
+            messages: List of incident message texts
+            batch_size: Maximum number of messages packed into one prompt
+            
+        Returns:
+            Dict mapping each message's index in `messages` to its analysis
+        """
+        results, pending = self._partition_pending(messages)
+        self._run_cascade(messages, pending, results, batch_size)
+        return results
+    
+    def _run_cascade(self, messages: List[str], pending: Dict[str, List[int]], results: Dict[int, Dict[str, Any]],
+                     batch_size: int):
+        """Send pending groups up the model tiers until each answer is confident"""
+        best = {}
+        last_error = None
+        groups = list(pending.items())
+        
+        for tier in self.cascade.model_tiers:
+            if not groups:
+                break
+            outputs, error = self._classify_groups(tier, messages, groups, batch_size)
+            last_error = error or last_error
+            groups = self._settle_tier(tier, groups, outputs, best)
+        
+        self._store_results(messages, pending, best, results, last_error)
+    
+    def _classify_groups(self, tier: CascadeTier, messages: List[str], groups: List, batch_size: int):
+        """
+        Classify groups with one tier: batched first, then per message for anything the batch missed
+        
+        Returns:
+            Tuple of (cache key -> result, last error seen)
+        """
+        outputs = {}
+        last_error = None
+        
+        for chunk in _chunk(groups, batch_size):
+            if len(chunk) < 2 or not tier.try_acquire():
+                continue
+            try:
+                text = self._call_model(tier, _build_batch_prompt([messages[indices[0]] for _, indices in chunk]),
+                                        120 * len(chunk), 'batch')
+                batch_results = _validate_batch_output(json.loads(text), len(chunk))
+            except Exception as e:
+                last_error = e
+                continue
+            for offset, (key, _) in enumerate(chunk):
+                if offset in batch_results:
+                    outputs[key] = batch_results[offset]
+        
+        # Batched output was missing or malformed for these messages
+        for key, indices in groups:
+            if key in outputs or not tier.try_acquire():
+                continue
+            try:
+                text = self._call_model(tier, _build_message_prompt(messages[indices[0]]), 200, 'single')
+                result = _validate_entry(json.loads(text))
+                if result is None:
+                    raise ValueError("malformed classification output")
+                outputs[key] = result
+            except Exception as e:
+                last_error = e
+        
+        return outputs, last_error
+    
+    def _call_model(self, tier: CascadeTier, prompt: str, max_tokens: int, call_type: str) -> str:
+        """One Messages API call against a tier's model, with usage accounting"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        with get_governor().slot(estimate_tokens(prompt, max_tokens, len(CLASSIFICATION_SYSTEM_PROMPT))) as usage:
+            started = time.perf_counter()
             response = self.client.messages.create(
-                model="claude-3-5-haiku@20241022",
-                max_tokens=200,
+                model=tier.model,
+                max_tokens=max_tokens,
+                system=SYSTEM_BLOCKS,
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
             )
+            usage['actual_tokens'] = response_tokens(response)
+        usage_tracker.record(call_type, tier.model, response, (time.perf_counter() - started) * 1000)
+        return response.content[0].text
+
+
+class AsyncMessageAnalyzer(_BaseMessageAnalyzer):
+    def __init__(self, project_id: str = None, region: str = None, cache: Optional[ClassificationCache] = None,
+                 prefilter: Optional[MessagePrefilter] = None, local_classifier: Optional[LocalClassifier] = None,
+                 offline: bool = ANALYZER_OFFLINE, cascade: Optional[ModelCascade] = None,
+                 rate_limiter: Optional[Any] = None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        Initialize the async analyzer (the Vertex client is shared and created lazily)
+        
+        Args:
+            max_concurrency: Maximum number of model calls in flight at once
+            (remaining arguments as for MessageAnalyzer)
+        """
+        super().__init__(project_id, region, cache, prefilter, local_classifier, offline, cascade, rate_limiter)
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = None
+        self._semaphore_loop = None
+    
+    @property
+    def client(self):
+        """Async Vertex client shared within the running event loop, created on first model call"""
+        return get_async_vertex_client(self.project_id, self.region)
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limiter bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    async def analyze_message(self, message: str) -> Dict[str, Any]:
+        """
+        Analyze a single incident message for significance
+        
+        Args:
+            message: The incident message to analyze
             
-            # Parse the JSON response
-            result = json.loads(response.content[0].text)
-            return result
+        Returns:
+            Dict with significance, category, reason, confidence and the tier that answered
+        """
+        local = self._answer_locally(message)
+        if local is not None:
+            return local
+        
+        cached = await asyncio.to_thread(self.cache.get, self._cache_key(message))  # SQLite I/O off the event loop
+        if cached is not None:
+            return cached
+        
+        results = {}
+        await self._run_cascade([message], {self._cache_key(message): [0]}, results, DEFAULT_BATCH_SIZE)
+        return results[0]
+    
+    async def analyze_messages(self, messages: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[int, Dict[str, Any]]:
+        """
+        Analyze many incident messages, running all batches of a tier concurrently
+        
+        Args:
+            messages: List of incident message texts
+            batch_size: Maximum number of messages packed into one prompt
             
-        except Exception as e:
-            return {
-                "significant": False,
-                "category": None,
-                "reason": f"Error analyzing message: {str(e)}"
-            }
+        Returns:
+            Dict mapping each message's index in `messages` to its analysis
+        """
+        results, pending = await asyncio.to_thread(self._partition_pending, messages)  # cache lookups off the loop
+        await self._run_cascade(messages, pending, results, batch_size)
+        return results
+    
+    async def _run_cascade(self, messages: List[str], pending: Dict[str, List[int]], results: Dict[int, Dict[str, Any]],
+                           batch_size: int):
+        """Send pending groups up the model tiers until each answer is confident"""
+        best = {}
+        last_error = None
+        groups = list(pending.items())
+        
+        for tier in self.cascade.model_tiers:
+            if not groups:
+                break
+            outputs, error = await self._classify_groups(tier, messages, groups, batch_size)
+            last_error = error or last_error
+            groups = self._settle_tier(tier, groups, outputs, best)
+        
+        await asyncio.to_thread(self._store_results, messages, pending, best, results, last_error)
+    
+    async def _classify_groups(self, tier: CascadeTier, messages: List[str], groups: List, batch_size: int):
+        """
+        Classify groups with one tier: all batches concurrently, then per-message calls concurrently
+        
+        Returns:
+            Tuple of (cache key -> result, last error seen)
+        """
+        outputs = {}
+        errors = []
+        
+        async def run_batch(chunk):
+            try:
+                text = await self._call_model(tier, _build_batch_prompt([messages[indices[0]] for _, indices in chunk]),
+                                              120 * len(chunk), 'batch')
+                batch_results = _validate_batch_output(json.loads(text), len(chunk))
+            except Exception as e:
+                errors.append(e)
+                return
+            for offset, (key, _) in enumerate(chunk):
+                if offset in batch_results:
+                    outputs[key] = batch_results[offset]
+        
+        async def run_single(key, indices):
+            try:
+                text = await self._call_model(tier, _build_message_prompt(messages[indices[0]]), 200, 'single')
+                result = _validate_entry(json.loads(text))
+                if result is None:
+                    raise ValueError("malformed classification output")
+                outputs[key] = result
+            except Exception as e:
+                errors.append(e)
+        
+        await asyncio.gather(*[
+            run_batch(chunk) for chunk in _chunk(groups, batch_size)
+            if len(chunk) >= 2 and tier.try_acquire()
+        ])
+        
+        # Batched output was missing or malformed for these messages
+        await asyncio.gather(*[
+            run_single(key, indices) for key, indices in groups
+            if key not in outputs and tier.try_acquire()
+        ])
+        
+        return outputs, (errors[-1] if errors else None)
+    
+    async def _call_model(self, tier: CascadeTier, prompt: str, max_tokens: int, call_type: str) -> str:
+        """One Messages API call against a tier's model, with usage accounting"""
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            if self.rate_limiter is not None:
+                await loop.run_in_executor(None, self.rate_limiter.acquire)
+            governor = get_governor()
+            charged = await loop.run_in_executor(
+                None, governor.acquire,
+                estimate_tokens(prompt, max_tokens, len(CLASSIFICATION_SYSTEM_PROMPT)), current_priority()
+            )
+            response = None
+            try:
+                started = time.perf_counter()
+                response = await self.client.messages.create(
+                    model=tier.model,
+                    max_tokens=max_tokens,
+                    system=SYSTEM_BLOCKS,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
+            finally:
+                governor.release(charged, response_tokens(response))
+            usage_tracker.record(call_type, tier.model, response, (time.perf_counter() - started) * 1000)
+        return response.content[0].text
 
 
 def main():
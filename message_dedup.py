@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Message Dedup - Bounded per-channel index of ingested Slack messages
+Keyed on Slack's exact ts string: O(1) lookups, a capped recent window, and a low
+watermark below which every message counts as already seen
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+
+DEDUP_WINDOW = int(os.getenv('DEDUP_WINDOW', '5000'))  # recent ts strings remembered per channel
+
+
+def ts_key(ts: str) -> Tuple[int, int]:
+    """Order Slack ts strings ('1700000000.123456') exactly, without going through float"""
+    seconds, _, micros = ts.partition('.')
+    return int(seconds), int(micros.ljust(6, '0')[:6] or 0)
+
+
+class _ChannelIndex:
+    __slots__ = ('recent', 'order', 'low_watermark')
+
+    def __init__(self):
+        self.recent = set()
+        self.order = deque()  # insertion order, for eviction
+        self.low_watermark = None  # newest evicted ts key; anything at or below it is treated as seen
+
+
+class DedupIndex:
+    def __init__(self, window: int = DEDUP_WINDOW):
+        """
+        Initialize the dedup index
+
+        Args:
+            window: Maximum message timestamps kept per channel
+        """
+        self.window = window
+        self._channels = {}  # channel_id -> _ChannelIndex
+        self._lock = threading.Lock()
+        self.stats = {'marked': 0, 'duplicates': 0, 'below_watermark': 0, 'evictions': 0}
+
+    def mark(self, channel_id: str, ts: Optional[str]) -> bool:
+        """
+        Record a message as ingested
+
+        Args:
+            channel_id: Channel the message was posted in
+            ts: Slack message ts, exactly as received
+
+        Returns:
+            True if the message is new, False if it was already ingested
+        """
+        if not ts:
+            return True
+
+        key = ts_key(ts)
+        with self._lock:
+            index = self._channels.get(channel_id)
+            if index is None:
+                index = self._channels[channel_id] = _ChannelIndex()
+
+            if ts in index.recent:
+                self.stats['duplicates'] += 1
+                return False
+            if index.low_watermark is not None and key <= index.low_watermark:
+                self.stats['below_watermark'] += 1
+                return False
+
+            index.recent.add(ts)
+            index.order.append(ts)
+            self.stats['marked'] += 1
+            while len(index.order) > self.window:
+                evicted = index.order.popleft()
+                index.recent.discard(evicted)
+                evicted_key = ts_key(evicted)
+                if index.low_watermark is None or evicted_key > index.low_watermark:
+                    index.low_watermark = evicted_key
+                self.stats['evictions'] += 1
+            return True
+
+    def seen(self, channel_id: str, ts: str) -> bool:
+        """Whether a message was already ingested (without recording it)"""
+        with self._lock:
+            index = self._channels.get(channel_id)
+            if index is None:
+                return False
+            return ts in index.recent or (index.low_watermark is not None and ts_key(ts) <= index.low_watermark)
+
+    def forget(self, channel_id: str):
+        """Drop a channel's index (e.g. when it is no longer monitored)"""
+        with self._lock:
+            self._channels.pop(channel_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, channels=len(self._channels),
+                        tracked=sum(len(index.order) for index in self._channels.values()))
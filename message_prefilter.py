@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Message Prefilter - Local keyword tier in front of the LLM
+Decides obvious chatter and unambiguous category messages without an API call
+"""
+
+import re
+import threading
+from typing import Dict, Any, Optional
+
+# Keyword patterns per group; every group is compiled into one combined regex
+PATTERNS = {
+    'diagnostics': [
+        r'root cause (?:is|was|identified|found|confirmed)', r'(?:found|identified|confirmed) (?:the )?root cause',
+        r'found the (?:issue|problem|bug|cause)', r'error pattern', r'identified',
+        r'correlat\w*', r'deadlock\w*', r'memory leak', r'stack ?trace', r'hypothesis (?:confirmed|refuted)',
+        r'isolated to', r'caused by', r'oom ?kill\w*', r'exception'
+    ],
+    'actions': [
+        r'roll(?:ing|ed)? back', r'rollback', r'revert(?:ing|ed)?', r'restart(?:ing|ed)?',
+        r'scal(?:ing|ed) (?:up|down|out|in)', r'scal(?:ing|ed) (?:the )?(?:replica|deployment|pool)',
+        r'deploy(?:ing|ed)', r'hotfix', r'cordon(?:ing|ed)?', r'drain(?:ing|ed)', r'failover',
+        r'fail(?:ing|ed) over', r'escalat(?:ing|ed)', r'applied', r'patch(?:ing|ed)'
+    ],
+    'impact': [
+        r'\d+(?:\.\d+)?% of', r'outage', r'degrad\w*', r'unavailable', r'affecting', r'impact expanded',
+        r'severity', r'sev ?[0-4]', r'new symptom', r'contained', r'customers? (?:are |is )?(?:affected|impacted|reporting)'
+    ],
+    'resolution': [
+        r'resolved', r'post-?mortem', r'\brca\b', r'follow-?up action', r'back to (?:normal|baseline)',
+        r'stable for', r'all systems normal', r'mitigated', r'clos(?:ing|ed) (?:the )?incident'
+    ],
+    'chatter': [
+        r'hi', r'hello', r'hey', r'thanks?', r'thank you', r'thx', r'ty', r'cheers', r'\+1', r':\+1:',
+        r'ack', r'ok(?:ay)?', r'sounds good', r'lgtm', r'np', r'on it', r'following', r'same here',
+        r'any updates?', r'status\??', r'eta\??', r'what(?:\'s| is) the status'
+    ],
+    'hedge': [
+        r'might', r'maybe', r'perhaps', r'not sure', r'thinking about', r'if needed', r'once approved',
+        r'preparing to', r'going to', r'should we', r'could be', r'possibly'
+    ]
+}
+
+CATEGORY_GROUPS = ('diagnostics', 'actions', 'impact', 'resolution')
+
+# Messages longer than this are never treated as pure chatter
+MAX_CHATTER_WORDS = 12
+
+# Words that may accompany chatter without adding content ("thanks team!", "+1 @alice")
+CHATTER_FILLERS = [r'team', r'all', r'everyone', r'folks', r'y\'?all', r'guys', r'so much', r'a lot', r'again', r'you']
+
+
+def _compile_chatter(chatter: list, fillers: list):
+    """Whole-message matcher: only chatter phrases, fillers, mentions, emoji and punctuation"""
+    token = '|'.join(chatter + fillers + [r'<[@#!][^>]*>', r':[\w+-]+:'])
+    return re.compile(f"^[\\W_]*(?:(?:{token})(?![\\w])[\\W_]*)+$", re.IGNORECASE)
+
+
+def _compile_patterns(patterns: Dict[str, list]):
+    """Compile all groups into a single alternation with one named group per category"""
+    alternatives = []
+    for group, group_patterns in patterns.items():
+        joined = '|'.join(group_patterns)
+        alternatives.append(f"(?P<{group}>(?<![\\w+])(?:{joined})(?![\\w]))")
+    return re.compile('|'.join(alternatives), re.IGNORECASE)
+
+
+class MessagePrefilter:
+    def __init__(self, enabled: bool = True, decide_categories: bool = False):
+        """
+        Initialize the prefilter
+
+        Args:
+            enabled: When False every message is forwarded to the model
+            decide_categories: Also answer messages that match exactly one category, through a multi-word
+                phrase, with no hedging (opt-in: a single keyword is not enough context)
+        """
+        self.enabled = enabled
+        self.decide_categories = decide_categories
+        self._matcher = _compile_patterns(PATTERNS)
+        self._chatter = _compile_chatter(PATTERNS['chatter'], CHATTER_FILLERS)
+        self._lock = threading.Lock()
+        self.stats = {
+            'evaluated': 0,
+            'skipped_chatter': 0,
+            'decided_locally': 0,
+            'forwarded': 0
+        }
+
+    def scan(self, message: str) -> Dict[str, list]:
+        """Single pass over the text, returning matched keywords per group"""
+        matches = {}
+        for match in self._matcher.finditer(message or ''):
+            matches.setdefault(match.lastgroup, []).append(match.group(0).lower())
+        return matches
+
+    def evaluate(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Try to classify a message locally
+
+        Args:
+            message: The incident message to classify
+
+        Returns:
+            Analysis dict when the prefilter is confident, None when the model must decide
+        """
+        if not self.enabled:
+            return None
+
+        matches = self.scan(message)
+        categories = [group for group in CATEGORY_GROUPS if group in matches]
+        word_count = len((message or '').split())
+
+        phrases = [keyword for category in categories for keyword in matches[category] if ' ' in keyword]
+
+        result = None
+        # Only messages made of nothing but chatter are skipped; anything else may carry a report
+        if word_count == 0 or (word_count <= MAX_CHATTER_WORDS and self._chatter.match(message)):
+            result = {
+                "significant": False,
+                "category": None,
+                "reason": "Prefilter: general chatter or status ping",
+                "tier": "prefilter"
+            }
+            outcome = 'skipped_chatter'
+        elif self.decide_categories and len(categories) == 1 and phrases and 'hedge' not in matches \
+                and not message.rstrip().endswith('?'):
+            category = categories[0]
+            result = {
+                "significant": True,
+                "category": category,
+                "reason": f"Prefilter: matched '{phrases[0]}' ({category})",
+                "tier": "prefilter"
+            }
+            outcome = 'decided_locally'
+        else:
+            outcome = 'forwarded'
+
+        with self._lock:
+            self.stats['evaluated'] += 1
+            self.stats[outcome] += 1
+
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return prefilter counters, including how many model calls were skipped"""
+        with self._lock:
+            stats = dict(self.stats)
+
+        skipped = stats['skipped_chatter'] + stats['decided_locally']
+        stats['llm_calls_skipped'] = skipped
+        stats['skip_rate'] = (skipped / stats['evaluated']) * 100 if stats['evaluated'] else 0
+        return stats
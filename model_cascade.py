@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Model Cascade - Confidence-based escalation across classification tiers
+local classifier -> Haiku -> larger model, each with a threshold and a call budget
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+LOCAL_TIER = 'local'
+
+DEFAULT_CASCADE_CONFIG = {
+    'tiers': [
+        {'name': LOCAL_TIER, 'threshold': float(os.getenv('LOCAL_CLASSIFIER_THRESHOLD', '0.85'))},
+        {'name': 'haiku', 'model': 'claude-3-5-haiku@20241022', 'threshold': 0.7, 'max_calls_per_hour': 5000},
+        {'name': 'sonnet', 'model': 'claude-3-5-sonnet@20240620', 'max_calls_per_hour': 200}
+    ],
+    'insights_model': 'claude-3-5-haiku@20241022'
+}
+
+
+class CascadeTier:
+    def __init__(self, name: str, model: Optional[str] = None, threshold: float = 0.0,
+                 max_calls_per_hour: Optional[int] = None):
+        """
+        Initialize a cascade tier
+
+        Args:
+            name: Tier name recorded on every result it answers
+            model: Vertex model ID (None for the local classifier tier)
+            threshold: Minimum confidence for this tier's answer to stand
+            max_calls_per_hour: Call budget over a sliding hour (None for unlimited)
+        """
+        self.name = name
+        self.model = model
+        self.threshold = threshold
+        self.max_calls_per_hour = max_calls_per_hour
+
+        self._calls = deque()  # call times inside the budget window
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'answered': 0, 'escalated': 0, 'budget_skips': 0}
+
+    def try_acquire(self) -> bool:
+        """Reserve one call against the budget; False when the budget is exhausted"""
+        now = time.time()
+        with self._lock:
+            if self.max_calls_per_hour is not None:
+                while self._calls and now - self._calls[0] > 3600:
+                    self._calls.popleft()
+                if len(self._calls) >= self.max_calls_per_hour:
+                    self.stats['budget_skips'] += 1
+                    return False
+                self._calls.append(now)
+            self.stats['calls'] += 1
+            return True
+
+    def record(self, outcome: str, count: int = 1):
+        """Count answered/escalated results"""
+        with self._lock:
+            self.stats[outcome] += count
+
+
+class ModelCascade:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the cascade
+
+        Args:
+            config: {'tiers': [...], 'insights_model': ...}; defaults to MODEL_CASCADE_CONFIG
+                (a JSON string or file path) or DEFAULT_CASCADE_CONFIG
+        """
+        config = config or load_cascade_config()
+
+        tiers = [CascadeTier(**tier) for tier in config.get('tiers', [])]
+        self.local_tier = next((tier for tier in tiers if tier.name == LOCAL_TIER), None)
+        self.model_tiers = [tier for tier in tiers if tier.model]
+        if not self.model_tiers:
+            raise ValueError("Model cascade needs at least one model tier")
+
+        self.insights_model = config.get('insights_model') or self.model_tiers[0].model
+
+    @property
+    def local_threshold(self) -> float:
+        """Confidence the local classifier needs to answer without escalating"""
+        return self.local_tier.threshold if self.local_tier else 1.01
+
+    @property
+    def signature(self) -> str:
+        """Identifies the model tiers, so cache entries are not shared across cascade changes"""
+        return '>'.join(tier.model for tier in self.model_tiers)
+
+    def is_confident(self, tier: CascadeTier, result: Dict[str, Any]) -> bool:
+        """Whether a tier's answer stands (the last tier always stands)"""
+        if tier is self.model_tiers[-1]:
+            return True
+        confidence = result.get('confidence')
+        return confidence is None or confidence >= tier.threshold
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-tier call, answer, escalation and budget counters"""
+        return {
+            tier.name: dict(tier.stats, model=tier.model, threshold=tier.threshold)
+            for tier in ([self.local_tier] if self.local_tier else []) + self.model_tiers
+        }
+
+
+def load_cascade_config() -> Dict[str, Any]:
+    """Read MODEL_CASCADE_CONFIG (inline JSON or a JSON file path), falling back to the default"""
+    raw = os.getenv('MODEL_CASCADE_CONFIG')
+    if not raw:
+        return DEFAULT_CASCADE_CONFIG
+
+    try:
+        if raw.lstrip().startswith('{'):
+            return json.loads(raw)
+        with open(raw, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Invalid MODEL_CASCADE_CONFIG, using default cascade: {e}")
+        return DEFAULT_CASCADE_CONFIG
+
+
+_default_cascade = None
+_default_lock = threading.Lock()
+
+
+def get_default_cascade() -> ModelCascade:
+    """Process-wide cascade so tier budgets are shared by every analyzer"""
+    global _default_cascade
+    with _default_lock:
+        if _default_cascade is None:
+            _default_cascade = ModelCascade()
+        return _default_cascade
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Name Cache - Bounded TTL caches for Slack user and channel names
+Warmed from paginated users.list / conversations.list so message handling and logging
+do not call users.info / conversations.info for every line
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterator
+
+NAME_CACHE_TTL = int(os.getenv('NAME_CACHE_TTL', '3600'))
+NAME_CACHE_MAX_ENTRIES = int(os.getenv('NAME_CACHE_MAX_ENTRIES', '5000'))
+PAGE_SIZE = 200  # Slack's recommended page size for list methods
+
+
+class TTLCache:
+    def __init__(self, max_entries: int = NAME_CACHE_MAX_ENTRIES, ttl_seconds: int = NAME_CACHE_TTL):
+        """
+        Initialize an in-memory LRU cache whose entries expire
+
+        Args:
+            max_entries: Maximum number of entries before the least recently used is evicted
+            ttl_seconds: Age after which an entry is treated as a miss
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'expired': 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a value, returning None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            self.stats['writes'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats, entries=len(self._entries))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+class SlackNameResolver:
+    def __init__(self, client, max_entries: int = NAME_CACHE_MAX_ENTRIES, ttl_seconds: int = NAME_CACHE_TTL):
+        """
+        Initialize the resolver
+
+        Args:
+            client: Slack WebClient
+            max_entries: Maximum cached names per kind (users, channels)
+            ttl_seconds: Seconds before a cached name is looked up again
+        """
+        self.client = client
+        self.users = TTLCache(max_entries, ttl_seconds)
+        self.channels = TTLCache(max_entries, ttl_seconds)
+
+    def warm(self):
+        """Fill both caches from users.list and conversations.list (up to max_entries each)"""
+        started = time.time()
+        try:
+            for member in self._paginate('users_list'):
+                self.users.put(member['id'], self._display_name(member))
+                if len(self.users) >= self.users.max_entries:
+                    break
+        except Exception as e:
+            print(f"⚠️ Could not warm user name cache: {e}")
+
+        try:
+            for channel in self.iter_channels(exclude_archived=True):
+                if len(self.channels) >= self.channels.max_entries:
+                    break
+        except Exception as e:
+            print(f"⚠️ Could not warm channel name cache: {e}")
+
+        print(f"📇 Cached {len(self.users)} user and {len(self.channels)} channel names "
+              f"in {time.time() - started:.1f}s")
+
+    def user_name(self, user_id: str) -> str:
+        """User display name, falling back to the ID when it cannot be resolved"""
+        name = self.users.get(user_id)
+        if name is not None:
+            return name
+        try:
+            response = self.client.users_info(user=user_id)
+            name = self._display_name(response['user'])
+        except Exception:
+            return user_id
+        self.users.put(user_id, name)
+        return name
+
+    def channel_name(self, channel_id: str) -> str:
+        """Channel name with a leading #, falling back to the ID when it cannot be resolved"""
+        name = self.channels.get(channel_id)
+        if name is None:
+            try:
+                response = self.client.conversations_info(channel=channel_id)
+                name = response['channel']['name']
+            except Exception:
+                return channel_id
+            self.channels.put(channel_id, name)
+        return f"#{name}"
+
+    def iter_channels(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Yield channels from every conversations.list page, caching their names on the way"""
+        kwargs.setdefault('types', "public_channel,private_channel")
+        for channel in self._paginate('conversations_list', **kwargs):
+            self.channels.put(channel['id'], channel['name'])
+            yield channel
+
+    def find_channel_id(self, channel_name: str) -> Optional[str]:
+        """Find a channel by name across all conversations.list pages"""
+        for channel in self.iter_channels():
+            if channel['name'] == channel_name:
+                return channel['id']
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'users': self.users.get_stats(), 'channels': self.channels.get_stats()}
+
+    def _paginate(self, method: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Yield every item of a cursor-paginated list method"""
+        key = 'members' if method == 'users_list' else 'channels'
+        cursor = None
+        while True:
+            response = getattr(self.client, method)(limit=PAGE_SIZE, cursor=cursor, **kwargs)
+            yield from response.get(key, [])
+            cursor = (response.get('response_metadata') or {}).get('next_cursor')
+            if not cursor:
+                return
+
+    @staticmethod
+    def _display_name(user: Dict[str, Any]) -> str:
+        return user.get('real_name') or user.get('profile', {}).get('real_name') or user.get('name') or user['id']
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detector - Collapses alert-storm messages that differ only in IDs and numbers
+Masks variable tokens, fingerprints the remaining template with SimHash and clusters by Hamming distance
+"""
+
+import hashlib
+import os
+import re
+from collections import Counter
+from typing import List, Dict
+
+_TOKEN_RE = re.compile(r'\S+')
+_SEGMENT_SPLIT_RE = re.compile(r'([\-_.:/=@#,;()\[\]{}"\'<>]+)')
+_UUID_RE = re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.IGNORECASE)
+_LONG_HEX_RE = re.compile(r'\b[0-9a-f]{12,}\b', re.IGNORECASE)
+
+FINGERPRINT_BITS = 64
+BAND_COUNT = 4
+BAND_BITS = FINGERPRINT_BITS // BAND_COUNT
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Smallest group treated as an alert storm; smaller groups ("error rate 5%" / "error rate 50%") stay separate
+NEAR_DUPLICATE_MIN_CLUSTER = int(os.getenv('NEAR_DUPLICATE_MIN_CLUSTER', '5'))
+
+
+def mask_variable_tokens(text: str) -> str:
+    """
+    Replace IDs, hashes and numbers with placeholders
+
+    "pod api-7f9c restarted after 3 retries" -> "pod api-# restarted after # retries"
+    """
+    text = _UUID_RE.sub('#', (text or '').lower())
+    text = _LONG_HEX_RE.sub('#', text)
+
+    masked_tokens = []
+    for token in _TOKEN_RE.findall(text):
+        if not any(ch.isdigit() for ch in token):
+            masked_tokens.append(token)
+            continue
+        segments = _SEGMENT_SPLIT_RE.split(token)
+        masked_tokens.append(''.join(
+            '#' if any(ch.isdigit() for ch in segment) else segment
+            for segment in segments
+        ))
+
+    return ' '.join(masked_tokens)
+
+
+def _feature_hash(feature: str) -> int:
+    """Stable 64-bit hash of a feature (Python's hash() is randomized per process)"""
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(masked_text: str) -> int:
+    """64-bit SimHash over word unigrams and bigrams of a masked template"""
+    tokens = masked_text.split()
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+
+    weights = [0] * FINGERPRINT_BITS
+    for feature in features:
+        value = _feature_hash(feature)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if (value >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints"""
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateDetector:
+    def __init__(self, max_distance: int = 3, min_cluster_size: int = NEAR_DUPLICATE_MIN_CLUSTER):
+        """
+        Initialize the detector
+
+        Args:
+            max_distance: Maximum Hamming distance between fingerprints in one cluster
+                (must be below BAND_COUNT so banded lookup cannot miss a match)
+            min_cluster_size: Members a group needs before it is collapsed; smaller groups are
+                kept as separate messages so changing values (5% -> 50%, v4.11 -> v4.12) stay visible
+        """
+        self.max_distance = min(max_distance, BAND_COUNT - 1)
+        self.min_cluster_size = max(2, min_cluster_size)
+
+    def cluster(self, texts: List[str]) -> List[int]:
+        """
+        Assign every text to a cluster
+
+        Args:
+            texts: Message texts in conversation order
+
+        Returns:
+            For each text, the index of its cluster representative (the first member); texts
+            in groups smaller than min_cluster_size are their own representative
+        """
+        assignments = []
+        exact = {}   # masked template -> representative index
+        bands = {}   # (band number, band value) -> representative indices
+        fingerprints = {}  # representative index -> fingerprint
+
+        for index, text in enumerate(texts):
+            masked = mask_variable_tokens(text)
+
+            representative = exact.get(masked)
+            if representative is None:
+                fingerprint = simhash(masked)
+                representative = self._find_similar(fingerprint, bands, fingerprints)
+
+                if representative is None:
+                    representative = index
+                    fingerprints[index] = fingerprint
+                    for band in range(BAND_COUNT):
+                        key = (band, (fingerprint >> (band * BAND_BITS)) & BAND_MASK)
+                        bands.setdefault(key, []).append(index)
+                exact[masked] = representative
+
+            assignments.append(representative)
+
+        sizes = Counter(assignments)
+        return [representative if sizes[representative] >= self.min_cluster_size else index
+                for index, representative in enumerate(assignments)]
+
+    def _find_similar(self, fingerprint: int, bands: Dict, fingerprints: Dict[int, int]):
+        """Look up an existing representative within max_distance using band buckets"""
+        # Pigeonhole: fingerprints within BAND_COUNT - 1 bits share at least one whole band
+        for band in range(BAND_COUNT):
+            key = (band, (fingerprint >> (band * BAND_BITS)) & BAND_MASK)
+            for candidate in bands.get(key, ()):
+                if hamming_distance(fingerprint, fingerprints[candidate]) <= self.max_distance:
+                    return candidate
+        return None
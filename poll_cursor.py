@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Poll Cursor - Persisted per-channel high-watermarks for conversations.history polling
+Each poll fetches only messages newer than the last one seen, across every result page
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from message_dedup import ts_key
+
+POLL_WATERMARK_PATH = os.getenv('POLL_WATERMARK_PATH', os.path.join('data', 'poll_watermarks.json'))
+POLL_INITIAL_LOOKBACK = int(os.getenv('POLL_INITIAL_LOOKBACK', '300'))  # first poll of a new channel
+POLL_MAX_LOOKBACK = int(os.getenv('POLL_MAX_LOOKBACK', '3600'))  # cap catch-up after downtime
+HISTORY_PAGE_SIZE = 200
+
+
+class WatermarkStore:
+    def __init__(self, path: Optional[str] = POLL_WATERMARK_PATH):
+        """
+        Initialize the watermark store
+
+        Args:
+            path: JSON file mapping channel ID to the newest seen message ts (None keeps it in memory)
+        """
+        self.path = path
+        self._watermarks = {}  # channel_id -> ts string, exactly as Slack returned it
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self._watermarks = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Could not read poll watermarks from {path}, starting fresh: {e}")
+
+    def get(self, channel_id: str) -> str:
+        """
+        Oldest ts to fetch from for a channel
+
+        New channels start POLL_INITIAL_LOOKBACK seconds back, and a stale watermark
+        (e.g. after downtime) is clamped to POLL_MAX_LOOKBACK so a restart cannot flood the buffer.
+        """
+        now = time.time()
+        with self._lock:
+            watermark = self._watermarks.get(channel_id)
+        if watermark is None:
+            return f"{now - POLL_INITIAL_LOOKBACK:.6f}"
+        oldest_allowed = f"{now - POLL_MAX_LOOKBACK:.6f}"
+        if ts_key(watermark) < ts_key(oldest_allowed):
+            return oldest_allowed
+        return watermark
+
+    def advance(self, channel_id: str, ts: str):
+        """Move a channel's watermark forward to ts (never backwards) and persist it"""
+        with self._lock:
+            current = self._watermarks.get(channel_id)
+            if current is not None and ts_key(ts) <= ts_key(current):  # exact, no float rounding
+                return
+            self._watermarks[channel_id] = ts
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._watermarks, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ Failed to persist poll watermarks: {e}")
+
+
+def fetch_history_since(client, channel_id: str, oldest: str) -> List[Dict[str, Any]]:
+    """
+    Fetch every message newer than oldest, following next_cursor pagination
+
+    Args:
+        client: Slack WebClient
+        channel_id: Channel to read
+        oldest: Exclusive lower bound ts
+
+    Returns:
+        Messages oldest first
+    """
+    messages = []
+    cursor = None
+    while True:
+        response = client.conversations_history(
+            channel=channel_id,
+            oldest=oldest,
+            limit=HISTORY_PAGE_SIZE,
+            cursor=cursor
+        )
+        messages.extend(response.get('messages', []))
+        cursor = (response.get('response_metadata') or {}).get('next_cursor')
+        if not response.get('has_more') or not cursor:
+            break
+
+    messages.sort(key=lambda message: ts_key(message.get('ts', '0')))  # same exact order as the watermark
+    return messages
@@ -8,12 +8,28 @@ import os
 import json
 import time
 import asyncio
+import threading
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from slack_sdk import WebClient
 from slack_sdk.rtm_v2 import RTMClient
 from batch_analyzer import BatchMessageAnalyzer
 from summary_generator import IncidentSummaryGenerator
+from incident_state import IncidentState
+from event_ingestion import create_event_source, CONTENT_SUBTYPES
+from name_cache import SlackNameResolver
+from poll_cursor import WatermarkStore, fetch_history_since
+from message_dedup import DedupIndex
+from analysis_queue import AnalysisWorkerPool
+from trigger_scheduler import DeadlineScheduler
+from adaptive_trigger import AdaptiveTrigger
+from token_usage import usage_tracker
+from llm_governor import get_governor, llm_priority, PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_LOW
+
+POLL_INTERVAL = 5  # seconds between polls when no event stream is connected
+EVENT_RECONCILE_INTERVAL = int(os.getenv('EVENT_RECONCILE_INTERVAL', '300'))  # safety-net poll while connected
+INCIDENT_RESET_QUIET = int(os.getenv('INCIDENT_RESET_QUIET', '3600'))  # quiet time after which a Resolved incident is closed
+INCIDENT_MAX_IDLE = int(os.getenv('INCIDENT_MAX_IDLE', '86400'))  # quiet time after which any incident is closed
 
 class IncidentSlackBot:
     def __init__(self, bot_token: str, app_token: str = None):
@@ -35,14 +51,45 @@ class IncidentSlackBot:
         # Bot state
         self.monitored_channels = set()
         self.message_buffer = {}  # channel_id -> list of messages
-        self.processed_messages = {}  # channel_id -> set of message timestamps
+        self.seen_messages = DedupIndex()  # channel_id -> recent ingested message ts strings (bounded)
         self.last_analysis = {}   # channel_id -> timestamp
+        self.incident_state = {}  # channel_id -> IncidentState (rolling, whole incident)
+        self.trigger_policy = AdaptiveTrigger()  # burst debounce, hourly cap, shorter interval on severity signals
         self.analysis_interval = 1800  # 30 minutes in seconds
         self.message_threshold = 10  # Number of messages to trigger analysis
+        self.defer_insights = os.getenv('DEFER_AI_INSIGHTS', 'true').lower() != 'false'  # post fast summary first
+        self.watermarks = WatermarkStore()  # channel_id -> newest polled message ts
+        self.event_source = None  # Socket Mode (or fake) source pushing message events
+        self._ingest_lock = threading.RLock()  # events arrive on SDK threads, polls on the main thread, analyses on workers
+        self.analysis_pool = AnalysisWorkerPool(self._perform_analysis)  # keeps slow analyses off the ingestion path
+        self.trigger_scheduler = DeadlineScheduler(self._on_analysis_deadline)  # time triggers, one deadline per channel
+        
+        # Cached user / channel names (warmed once instead of one API call per message and log line)
+        self.names = SlackNameResolver(self.client)
         
         # Bot info
         self.bot_user_id = None
         self._get_bot_info()
+        if os.getenv('NAME_CACHE_WARM', 'true').lower() != 'false':
+            self.names.warm()
+    
+    @property
+    def analysis_interval(self) -> float:
+        """Seconds after the last analysis before buffered messages are analyzed anyway"""
+        return self.trigger_policy.analysis_interval
+    
+    @analysis_interval.setter
+    def analysis_interval(self, seconds: float):
+        self.trigger_policy.analysis_interval = seconds
+    
+    @property
+    def message_threshold(self) -> int:
+        """Buffered messages that trigger an analysis (debounced while the channel is bursting)"""
+        return self.trigger_policy.message_threshold
+    
+    @message_threshold.setter
+    def message_threshold(self, count: int):
+        self.trigger_policy.message_threshold = count
     
     def _get_bot_info(self):
         """Get bot user information"""
@@ -68,14 +115,8 @@ class IncidentSlackBot:
             if channel_name.startswith('#'):
                 channel_name = channel_name[1:]
             
-            # Get channel info
-            response = self.client.conversations_list(types="public_channel,private_channel")
-            
-            channel_id = None
-            for channel in response['channels']:
-                if channel['name'] == channel_name:
-                    channel_id = channel['id']
-                    break
+            # Get channel info (all pages, so large workspaces still find the channel)
+            channel_id = self.names.find_channel_id(channel_name)
             
             if not channel_id:
                 print(f"❌ Channel '{channel_name}' not found")
@@ -92,7 +133,6 @@ class IncidentSlackBot:
             # Add to monitoring
             self.monitored_channels.add(channel_id)
             self.message_buffer[channel_id] = []
-            self.processed_messages[channel_id] = set()
             self.last_analysis[channel_id] = datetime.now()
             
             print(f"✅ Now monitoring #{channel_name} (ID: {channel_id})")
@@ -134,78 +174,153 @@ class IncidentSlackBot:
     
     def _get_user_name(self, user_id: str) -> str:
         """Get user display name"""
-        try:
-            response = self.client.users_info(user=user_id)
-            return response['user']['real_name'] or response['user']['name']
-        except:
-            return user_id
+        return self.names.user_name(user_id)
     
     def _get_channel_name(self, channel_id: str) -> str:
         """Get channel name"""
-        try:
-            response = self.client.conversations_info(channel=channel_id)
-            return f"#{response['channel']['name']}"
-        except:
-            return channel_id
+        return self.names.channel_name(channel_id)
     
     def _check_analysis_trigger(self, channel_id: str):
-        """Check if analysis should be triggered"""
-        now = datetime.now()
-        last_analysis = self.last_analysis.get(channel_id, now)
-        messages_count = len(self.message_buffer.get(channel_id, []))
-        
-        # Trigger analysis if:
-        # 1. 30+ minutes since last analysis
-        # 2. OR threshold new messages accumulated
-        time_trigger = (now - last_analysis).total_seconds() > self.analysis_interval
-        message_trigger = messages_count >= self.message_threshold
-        
-        if time_trigger or message_trigger:
-            trigger_reason = "time interval" if time_trigger else f"{messages_count} messages"
+        """Move the channel's analysis deadline after a new message"""
+        messages = self.message_buffer.get(channel_id, [])
+        if not messages:
+            return
+        
+        # Trigger analysis when (whichever comes first):
+        # 1. threshold new messages accumulated (after a quiet gap while the channel is bursting)
+        # 2. OR 30+ minutes since last analysis (5 while impact/outage signals are active)
+        # Deadlines are fired by the scheduler, even if the channel goes quiet
+        delay, _ = self.trigger_policy.on_message(
+            channel_id, messages[-1]['text'], len(messages), self._seconds_since_analysis(channel_id)
+        )
+        if delay <= 0 and self.analysis_pool.in_flight(channel_id):
+            # Due now while a run is in flight: ask the pool for its coalesced rerun instead of re-arming
+            self._request_analysis(channel_id)
+            return
+        self.trigger_scheduler.schedule(channel_id, delay)
+    
+    def _seconds_since_analysis(self, channel_id: str) -> float:
+        last_analysis = self.last_analysis.get(channel_id)
+        return (datetime.now() - last_analysis).total_seconds() if last_analysis else 0.0
+    
+    def _arm_time_trigger(self, channel_id: str):
+        """Schedule the channel's time trigger after its last analysis"""
+        interval = self.trigger_policy.severe_interval if self.trigger_policy.is_severe(channel_id) else self.analysis_interval
+        self.trigger_scheduler.schedule(channel_id, interval - self._seconds_since_analysis(channel_id))
+    
+    def _on_analysis_deadline(self, channel_id: str):
+        """Analysis deadline fired by the scheduler"""
+        self._request_analysis(channel_id)
+    
+    def _request_analysis(self, channel_id: str):
+        """Queue an analysis unless the channel's hourly cap is used up (takes the ingest lock itself)"""
+        with self._ingest_lock:
+            if not self.message_buffer.get(channel_id):
+                return
+            wait, trigger_reason = self.trigger_policy.admit(channel_id)
+            if trigger_reason is None:
+                print(f"⏸️ Hourly analysis cap reached for {self._get_channel_name(channel_id)}, "
+                      f"next analysis in {wait / 60:.0f} min")
+                self.trigger_scheduler.schedule(channel_id, wait)
+                return
+            self._queue_analysis(channel_id, trigger_reason)
+    
+    def _queue_analysis(self, channel_id: str, trigger_reason: str):
+        """Queue an analysis for a background worker; while one runs for this channel, new messages join the next run"""
+        if self.analysis_pool.submit(channel_id):
             print(f"🔍 Triggering analysis for {self._get_channel_name(channel_id)} ({trigger_reason})")
-            self._perform_analysis(channel_id)
     
     def _perform_analysis(self, channel_id: str):
-        """Perform incident analysis on channel messages"""
+        """Perform incident analysis on channel messages (runs on an analysis worker)"""
         
-        messages = self.message_buffer.get(channel_id, [])
-        if not messages:
-            print(f"⚠️ No messages to analyze in {self._get_channel_name(channel_id)}")
-            return
+        # Take the buffered messages; anything arriving from now on goes to the next run
+        with self._ingest_lock:
+            messages = self.message_buffer.get(channel_id, [])
+            if not messages:
+                print(f"⚠️ No messages to analyze in {self._get_channel_name(channel_id)}")
+                return
+            self.message_buffer[channel_id] = []
+            self.last_analysis[channel_id] = datetime.now()
+            self.trigger_scheduler.cancel(channel_id)  # re-armed by the next buffered message
+            self.trigger_policy.record_run(channel_id)  # only runs that start count against the hourly cap
         
+        folded = False
         try:
             print(f"🔬 Analyzing {len(messages)} messages...")
             
-            # Perform batch analysis
-            analysis_results = self.batch_analyzer.analyze_conversation(messages)
-            
-            # Generate comprehensive summary  
-            comprehensive_summary = self.summary_generator.generate_comprehensive_summary(analysis_results)
+            # Model calls wait behind other channels' by urgency (impact/outage and Active Response first)
+            priority = self._analysis_priority(channel_id)
             
-            # Post summary to channel
-            self._post_analysis_summary(channel_id, analysis_results, comprehensive_summary)
+            # Perform batch analysis (new messages only)
+            with llm_priority(priority):
+                analysis_results = self.batch_analyzer.analyze_conversation(messages)
             
-            # Reset for next analysis but keep track of processed messages
-            analyzed_timestamps = {
-                datetime.fromisoformat(msg['timestamp'].replace('Z', '+00:00')).timestamp() 
-                for msg in messages
-            }
-            self.processed_messages[channel_id].update(analyzed_timestamps)
+            # Fold into the channel's rolling incident state and summarize the whole incident
+            state = self._current_incident_state(channel_id)
+            state.fold(analysis_results)
+            folded = True
+            self.trigger_policy.set_incident_severity(
+                channel_id, state.impact_assessment()['severity'] == 'high' and state.status != 'Resolved'
+            )
+            with llm_priority(priority):
+                if self.defer_insights:
+                    comprehensive_summary, pending_insights = self.summary_generator.generate_summary_deferred(state)
+                else:
+                    comprehensive_summary = self.summary_generator.generate_summary_from_state(state)
+                    pending_insights = None
             
-            self.message_buffer[channel_id] = []
-            self.last_analysis[channel_id] = datetime.now()
+            # Post summary to channel (AI insights are filled in by updating the same message)
+            message_ts = self._post_analysis_summary(channel_id, analysis_results, comprehensive_summary)
             
-            # Save analysis results
-            self._save_analysis_results(channel_id, comprehensive_summary)
+            # Save analysis results (once insights are in, when they are still being generated)
+            if pending_insights is not None:
+                pending_insights.add_done_callback(
+                    lambda future: self._complete_summary(channel_id, message_ts, analysis_results,
+                                                          comprehensive_summary, future)
+                )
+            else:
+                self._save_analysis_results(channel_id, comprehensive_summary, analysis_results.get('all_results'))
             self._log_basic_metrics(channel_id, True)
             
         except Exception as e:
             print(f"❌ Analysis failed: {e}")
+            with self._ingest_lock:
+                if not folded:
+                    # Put the messages back so the next run retries them (once folded, the next summary covers them)
+                    self.message_buffer[channel_id] = messages + self.message_buffer.get(channel_id, [])
+                self._arm_time_trigger(channel_id)
             self._post_error_message(channel_id, str(e))
             self._log_basic_metrics(channel_id, False, e)
     
-    def _post_analysis_summary(self, channel_id: str, analysis: Dict, summary: Dict):
-        """Post analysis summary to Slack channel"""
+    def _analysis_priority(self, channel_id: str) -> int:
+        """LLM priority for a channel's analysis, based on what is known before it runs"""
+        state = self.incident_state.get(channel_id)
+        if self.trigger_policy.is_severe(channel_id) or (state is not None and state.status == "Active Response"):
+            return PRIORITY_URGENT
+        if state is not None and not state.significant_messages:
+            return PRIORITY_LOW  # analyzed before and nothing significant yet
+        return PRIORITY_NORMAL
+    
+    def _current_incident_state(self, channel_id: str) -> IncidentState:
+        """The channel's rolling incident state, starting a new incident once the previous one has gone quiet"""
+        state = self.incident_state.get(channel_id)
+        if state is not None and state.updated_at is not None:
+            quiet = (datetime.now() - state.updated_at).total_seconds()
+            if quiet > INCIDENT_MAX_IDLE or (state.status == 'Resolved' and quiet > INCIDENT_RESET_QUIET):
+                self.reset_incident_state(channel_id)
+                state = None
+        if state is None:
+            state = self.incident_state[channel_id] = IncidentState(channel_id)
+        return state
+    
+    def reset_incident_state(self, channel_id: str):
+        """Start tracking a new incident in a channel"""
+        self.incident_state.pop(channel_id, None)
+        self.trigger_policy.set_incident_severity(channel_id, False)
+        print(f"🔄 Reset incident state for {self._get_channel_name(channel_id)}")
+    
+    def _post_analysis_summary(self, channel_id: str, analysis: Dict, summary: Dict) -> Optional[str]:
+        """Post analysis summary to Slack channel, returning the message ts"""
         
         try:
             # Create Slack message blocks
@@ -218,9 +333,32 @@ class IncidentSlackBot:
             )
             
             print(f"✅ Posted analysis summary to {self._get_channel_name(channel_id)}")
+            return response.get('ts')
             
         except Exception as e:
             print(f"❌ Failed to post summary: {e}")
+            return None
+    
+    def _complete_summary(self, channel_id: str, message_ts: Optional[str], analysis: Dict, summary: Dict, future):
+        """Merge background AI insights into a posted summary and update the Slack message in place"""
+        try:
+            summary.update(future.result())
+        except Exception as e:
+            summary.update({'ai_insights': f"AI insights unavailable: {e}", 'ai_insights_pending': False})
+        
+        if message_ts:
+            try:
+                self.client.chat_update(
+                    channel=channel_id,
+                    ts=message_ts,
+                    text="🤖 Incident Analysis Summary",
+                    blocks=self._create_summary_blocks(analysis, summary)
+                )
+                print(f"✅ Added AI insights to summary in {self._get_channel_name(channel_id)}")
+            except Exception as e:
+                print(f"❌ Failed to update summary with AI insights: {e}")
+        
+        self._save_analysis_results(channel_id, summary, analysis.get('all_results'))
     
     def _create_summary_blocks(self, analysis: Dict, summary: Dict) -> List[Dict]:
         """Create Slack blocks for the summary"""
@@ -292,6 +430,41 @@ class IncidentSlackBot:
                 }
             })
         
+        # Add AI insights with when they were last refreshed
+        ai_insights = summary.get('ai_insights')
+        if summary.get('ai_insights_pending'):
+            blocks.append({
+                "type": "context",
+                "elements": [
+                    {
+                        "type": "mrkdwn",
+                        "text": "🧠 AI insights are being generated and will appear here shortly..."
+                    }
+                ]
+            })
+        elif ai_insights and summary.get('ai_insights_refreshed_at'):
+            blocks.append({
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"*AI Insights:*\n{ai_insights[:2900]}"
+                }
+            })
+
+            refreshed_at = datetime.fromisoformat(summary['ai_insights_refreshed_at']).strftime('%Y-%m-%d %H:%M')
+            marker = f"🧠 Insights last refreshed {refreshed_at}"
+            if summary.get('ai_insights_reused'):
+                marker += " (no significant change since)"
+            blocks.append({
+                "type": "context",
+                "elements": [
+                    {
+                        "type": "mrkdwn",
+                        "text": marker
+                    }
+                ]
+            })
+
         # Add feedback section
         blocks.append({
             "type": "divider"
@@ -338,15 +511,15 @@ class IncidentSlackBot:
         except Exception as e:
             print(f"❌ Failed to post error message: {e}")
     
-    def _save_analysis_results(self, channel_id: str, summary: Dict):
-        """Save analysis results to file"""
+    def _save_analysis_results(self, channel_id: str, summary: Dict, all_results: Optional[List[Dict]] = None):
+        """Save analysis results to file (per-message results double as local classifier training data)"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         channel_name = self._get_channel_name(channel_id).replace('#', '').replace(' ', '_')
         filename = f"analysis_{channel_name}_{timestamp}.json"
         
         try:
             with open(filename, 'w') as f:
-                json.dump(summary, f, indent=2)
+                json.dump({**summary, 'all_results': all_results or []}, f, indent=2)
             print(f"💾 Analysis saved to {filename}")
         except Exception as e:
             print(f"⚠️ Failed to save analysis: {e}")
@@ -359,7 +532,16 @@ class IncidentSlackBot:
             'channel': self._get_channel_name(channel_id),
             'success': success,
             'error': str(error) if error else None,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now().isoformat(),
+            'name_cache': self.names.get_stats(),
+            'dedup': self.seen_messages.get_stats(),
+            'analysis_queue': self.analysis_pool.get_stats(),
+            'trigger_scheduler': self.trigger_scheduler.get_stats(),
+            'triggers': self.trigger_policy.get_stats(),
+            'llm_governor': get_governor().get_stats(),
+            'classifier': self.batch_analyzer.analyzer.get_stats(),
+            'insights': dict(self.summary_generator.insights_stats),
+            'token_usage': usage_tracker.get_stats()
         }
         
         try:
@@ -368,8 +550,17 @@ class IncidentSlackBot:
         except Exception as e:
             print(f"⚠️ Failed to log metrics: {e}")
     
-    def start_monitoring(self):
-        """Start monitoring channels for messages"""
+    def start_monitoring(self, event_source=None):
+        """
+        Start monitoring channels for messages
+
+        Message events are pushed through Socket Mode when an app token is configured
+        (or through the given event source); polling is only used as a fallback while
+        no event stream is connected, plus an occasional reconcile poll for missed events.
+
+        Args:
+            event_source: Source with start(handler) / is_connected() / stop(), e.g. FakeEventSource
+        """
         
         if not self.monitored_channels:
             print("⚠️ No channels to monitor. Add channels first.")
@@ -378,52 +569,84 @@ class IncidentSlackBot:
         print(f"🚀 Starting monitoring of {len(self.monitored_channels)} channels...")
         print("📡 Listening for messages... (Press Ctrl+C to stop)")
         
+        self.event_source = event_source or create_event_source(self.app_token, self.client)
+        if self.event_source is not None:
+            try:
+                self.event_source.start(self.handle_event)
+            except Exception as e:
+                print(f"⚠️ Could not start event stream, falling back to polling: {e}")
+                self.event_source = None
+        else:
+            print(f"ℹ️ No SLACK_APP_TOKEN set, polling channels every {POLL_INTERVAL} seconds")
+        
+        self.trigger_scheduler.start()
+        
         try:
-            # Simple polling approach (you can upgrade to RTM or Socket Mode later)
+            last_poll = 0.0
             while True:
-                self._poll_messages()
-                time.sleep(5)  # Poll every 5 seconds
+                connected = self.event_source is not None and self.event_source.is_connected()
+                interval = EVENT_RECONCILE_INTERVAL if connected else POLL_INTERVAL
+                if time.monotonic() - last_poll >= interval:
+                    self._poll_messages()
+                    last_poll = time.monotonic()
+                time.sleep(POLL_INTERVAL)
                 
         except KeyboardInterrupt:
             print("\n🛑 Monitoring stopped by user")
         except Exception as e:
             print(f"❌ Monitoring error: {e}")
+        finally:
+            if self.event_source is not None:
+                self.event_source.stop()
+            self.trigger_scheduler.stop()
+            self.analysis_pool.shutdown(wait=False)
+    
+    def handle_event(self, event: Dict[str, Any]):
+        """
+        Handle one pushed Slack event
+        
+        Args:
+            event: Inner Events API event (only channel messages with content subtypes are processed)
+        """
+        if event.get('type') != 'message':
+            return
+        
+        channel_id = event.get('channel')
+        if channel_id not in self.monitored_channels:
+            return
+        
+        with self._ingest_lock:
+            if self._is_new_message(channel_id, event):
+                self.process_message(channel_id, event)
+    
+    def _is_new_message(self, channel_id: str, message: Dict[str, Any]) -> bool:
+        """Whether a message carries content and was not ingested yet (recording it as ingested)"""
+        if message.get('subtype') not in CONTENT_SUBTYPES or not message.get('text'):
+            return False
+        
+        # Exact ts match against buffered and analyzed messages, whether polled or pushed
+        return self.seen_messages.mark(channel_id, message.get('ts'))
     
     def _poll_messages(self):
-        """Poll channels for new messages"""
-        for channel_id in self.monitored_channels:
+        """Poll channels for messages newer than each channel's watermark"""
+        for channel_id in list(self.monitored_channels):
             try:
-                # Get recent messages (last 5 minutes)
-                oldest = time.time() - 300  # 5 minutes ago
-                
-                response = self.client.conversations_history(
-                    channel=channel_id,
-                    oldest=oldest,
-                    limit=50
-                )
+                # Only messages after the newest one already seen, across all pages
+                messages = fetch_history_since(self.client, channel_id, self.watermarks.get(channel_id))
+                if not messages:
+                    continue
                 
                 # Process new messages
-                for message in reversed(response['messages']):
-                    message_ts = float(message.get('ts', 0))
-                    
-                    # Skip if we've already processed this message
-                    if message_ts in self.processed_messages.get(channel_id, set()):
-                        continue
-                    
-                    # Check if message is already in current buffer
-                    current_messages = self.message_buffer.get(channel_id, [])
-                    already_in_buffer = any(
-                        abs(datetime.fromisoformat(msg['timestamp'].replace('Z', '+00:00')).timestamp() - message_ts) < 1
-                        for msg in current_messages
-                    )
-                    
-                    if not already_in_buffer and message.get('text'):
-                        self.process_message(channel_id, message)
+                with self._ingest_lock:
+                    for message in messages:
+                        if self._is_new_message(channel_id, message):
+                            self.process_message(channel_id, message)
+                
+                self.watermarks.advance(channel_id, messages[-1]['ts'])
             
             except Exception as e:
                 print(f"⚠️ Error polling {self._get_channel_name(channel_id)}: {e}")
 
-
 def main():
     """Test the Slack bot"""
     
@@ -445,8 +668,8 @@ def main():
     print("🤖 Claude Incident Analysis Slack Bot")
     print("=" * 50)
     
-    # Initialize bot
-    bot = IncidentSlackBot(bot_token)
+    # Initialize bot (SLACK_APP_TOKEN enables Socket Mode events instead of polling)
+    bot = IncidentSlackBot(bot_token, app_token=os.getenv('SLACK_APP_TOKEN'))
     
     # Add test channel
     test_channel = input("Enter channel name to monitor (e.g., 'claude-test'): ").strip()
@@ -13,6 +13,7 @@ def main():
 
     # Get required environment variables
     bot_token = os.getenv('SLACK_BOT_TOKEN')
+    app_token = os.getenv('SLACK_APP_TOKEN')  # optional, enables Socket Mode
     anthropic_project = os.getenv('ANTHROPIC_VERTEX_PROJECT_ID')
     anthropic_region = os.getenv('ANTHROPIC_VERTEX_REGION', 'us-central1')
 
@@ -39,13 +40,14 @@ def main():
     print("=" * 60)
     print(f"📊 GCP Project: {anthropic_project}")
     print(f"🌍 GCP Region: {anthropic_region}")
+    print(f"📡 Ingestion: {'Socket Mode events' if app_token else 'polling'}")
     print(f"📢 Monitoring Channel: #{channel_name}")
     print("=" * 60)
 
     try:
         # Initialize the bot
         print("\n🔄 Initializing Slack bot...")
-        bot = IncidentSlackBot(bot_token=bot_token)
+        bot = IncidentSlackBot(bot_token=bot_token, app_token=app_token)
 
         print(f"✅ Bot initialized successfully (User ID: {bot.bot_user_id})")
 
@@ -22,16 +22,10 @@ def discover_invited_channels(bot):
         Number of channels being monitored
     """
     try:
-        # Get all channels where bot is a member
-        response = bot.client.conversations_list(
-            types="public_channel,private_channel",
-            exclude_archived=True,
-            limit=1000
-        )
-
+        # Get all channels where bot is a member (every page, names go into the bot's cache)
         invited_channels = []
 
-        for channel in response.get('channels', []):
+        for channel in bot.names.iter_channels(exclude_archived=True):
             # Only monitor channels where bot is explicitly a member (invited)
             if channel.get('is_member', False):
                 channel_name = channel['name']
@@ -43,7 +37,6 @@ def discover_invited_channels(bot):
             if channel_id not in bot.monitored_channels:
                 bot.monitored_channels.add(channel_id)
                 bot.message_buffer[channel_id] = []
-                bot.processed_messages[channel_id] = set()
                 bot.last_analysis[channel_id] = datetime.now()
                 print(f"   ✅ Now monitoring #{channel_name} (ID: {channel_id})")
 
@@ -59,6 +52,7 @@ def main():
 
     # Get required environment variables
     bot_token = os.getenv('SLACK_BOT_TOKEN')
+    app_token = os.getenv('SLACK_APP_TOKEN')  # optional, enables Socket Mode
     anthropic_project = os.getenv('ANTHROPIC_VERTEX_PROJECT_ID')
     anthropic_region = os.getenv('ANTHROPIC_VERTEX_REGION', 'us-central1')
 
@@ -79,13 +73,14 @@ def main():
     print("=" * 70)
     print(f"📊 GCP Project: {anthropic_project}")
     print(f"🌍 GCP Region: {anthropic_region}")
+    print(f"📡 Ingestion: {'Socket Mode events' if app_token else 'polling'}")
     print(f"🎯 Mode: Monitors only channels where bot is invited")
     print("=" * 70)
 
     try:
         # Initialize the bot
         print("\n🔄 Initializing Slack bot...")
-        bot = IncidentSlackBot(bot_token=bot_token)
+        bot = IncidentSlackBot(bot_token=bot_token, app_token=app_token)
 
         print(f"✅ Bot initialized successfully (User ID: {bot.bot_user_id})")
 
@@ -3,222 +3,317 @@
 Enhanced Summary Generator - Creates executive and technical summaries from incident analysis
 """
 
+import contextvars
+import hashlib
 import json
 import os
-from typing import Dict, List, Any
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
-from message_analyzer import MessageAnalyzer
+from model_cascade import get_default_cascade
+from incident_state import IncidentState
+from token_usage import usage_tracker
+from llm_governor import get_governor, estimate_tokens, response_tokens
+from vertex_client import get_vertex_client
+
+# New significant events that force an insights refresh even without a new category or resolution
+INSIGHTS_REFRESH_EVENTS = int(os.getenv('INSIGHTS_REFRESH_EVENTS', '5'))
+MAX_CACHED_INSIGHTS = 256
+
+# Map-reduce insights: context larger than this (estimated tokens) is summarized chunk by chunk
+INSIGHTS_CHUNK_TOKENS = int(os.getenv('INSIGHTS_CHUNK_TOKENS', '2000'))
+INSIGHTS_MAP_WORKERS = int(os.getenv('INSIGHTS_MAP_WORKERS', '4'))
+INSIGHTS_MAX_REDUCE_LEVELS = 3  # combine rounds before the newest phase summaries are kept and the rest dropped
+INSIGHTS_CHUNK_SPAN = 100  # message IDs per chunk group, so dropping old events only changes the oldest group
+MAX_CACHED_CHUNK_SUMMARIES = 2048
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
 
 class IncidentSummaryGenerator:
-    def __init__(self):
-        """Initialize the summary generator"""
-        self.analyzer = MessageAnalyzer()
+    def __init__(self, refresh_events: int = INSIGHTS_REFRESH_EVENTS):
+        """
+        Initialize the summary generator
+        
+        Args:
+            refresh_events: New significant events after which cached insights are regenerated
+        """
+        self.model = get_default_cascade().insights_model
+        self.refresh_events = refresh_events
+        self._insights_by_fingerprint = OrderedDict()  # fingerprint -> (insights, refreshed_at)
+        self._insights_by_scope = OrderedDict()  # scope (one rolling incident) -> last refresh snapshot
+        self._chunk_summaries = OrderedDict()  # chunk fingerprint -> partial summary
+        self.insights_stats = {'generated': 0, 'reused': 0, 'chunks_summarized': 0, 'chunks_cached': 0}
+        self._insights_lock = threading.Lock()  # guards the insight and chunk caches
+        self._insights_executor = None  # background insights for deferred summaries
+    
+    @property
+    def client(self):
+        """Shared Vertex client, created on first model call"""
+        return get_vertex_client()
     
     def generate_comprehensive_summary(self, analysis_results: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate comprehensive incident summary from batch analysis results
         
+        All sections come from a single pass over the significant messages (an
+        IncidentState fold); callers appending messages over time should keep the
+        state and use fold / generate_summary_from_state instead.
+        
         Args:
             analysis_results: Results from BatchMessageAnalyzer
             
         Returns:
             Dict with multiple summary formats
         """
+        state = IncidentState(max_events=None)
+        state.fold(analysis_results)
+        summary, _ = self._build_summary(state)
+        return summary
+    
+    def generate_summary_from_state(self, state: IncidentState) -> Dict[str, Any]:
+        """
+        Generate a comprehensive summary from rolling incident state
         
-        # Extract key data
-        significant_messages = analysis_results.get('significant_messages', [])
-        categories = analysis_results.get('categories', {})
-        total_messages = analysis_results.get('total_messages', 0)
+        Every section is read from the state's running accumulators, so the cost
+        does not grow with the number of earlier analysis runs.
         
-        # Generate different summary types
-        executive_summary = self._generate_executive_summary(significant_messages, categories)
-        technical_timeline = self._generate_technical_timeline(significant_messages)
-        action_items = self._generate_action_items(significant_messages)
-        impact_assessment = self._generate_impact_assessment(significant_messages, categories)
-        ai_insights = self._generate_ai_insights(significant_messages)
+        Args:
+            state: Per-channel IncidentState covering the whole incident so far
+            
+        Returns:
+            Dict in the same format as generate_comprehensive_summary
+        """
+        summary, _ = self._build_summary(state, scope=(state.channel_id, state.started_at))
+        return summary
+    
+    def generate_summary_deferred(self, source: Union[IncidentState, Dict[str, Any]]) -> Tuple[Dict[str, Any], Optional[Future]]:
+        """
+        Build every local section now and generate AI insights in the background
         
-        return {
+        Args:
+            source: A rolling IncidentState, or BatchMessageAnalyzer results
+            
+        Returns:
+            Tuple of (summary, future). When insights could be reused the summary is already
+            complete and the future is None; otherwise the summary has 'ai_insights_pending'
+            set and the future resolves to the ai_insights* fields to merge in.
+        """
+        if isinstance(source, IncidentState):
+            return self._build_summary(source, scope=(source.channel_id, source.started_at), defer_insights=True)
+        
+        state = IncidentState(max_events=None)
+        state.fold(source)
+        return self._build_summary(state, defer_insights=True)
+    
+    def _build_summary(self, state: IncidentState, scope: Optional[Any] = None,
+                       defer_insights: bool = False) -> Tuple[Dict[str, Any], Optional[Future]]:
+        """Assemble every summary section from an incident state, optionally leaving insights to a background thread"""
+        categories = dict(state.categories)
+        status = state.status
+        messages = list(state.significant_messages)  # snapshot of the most recent events; the state keeps changing
+        events = state.significant_count
+        
+        pending = None
+        if defer_insights and messages:
+            cached = self._lookup_insights(self._build_insights_context(messages), events, categories, scope)
+            if cached is not None:
+                insights, refreshed_at, reused = cached
+            else:
+                insights, refreshed_at, reused = "⏳ AI insights are being generated...", None, False
+                pending = self._get_insights_executor().submit(
+                    contextvars.copy_context().run, self._insights_fields, messages, categories, scope, events
+                )  # copied context keeps the caller's LLM priority
+        else:
+            insights, refreshed_at, reused = self._get_ai_insights(messages, categories, scope, events)
+        
+        summary = {
             'incident_overview': {
-                'total_messages_analyzed': total_messages,
-                'significant_events': len(significant_messages),
+                'total_messages_analyzed': state.total_messages,
+                'significant_events': events,
                 'categories_detected': categories,
-                'incident_status': self._determine_incident_status(significant_messages)
+                'incident_status': status
             },
-            'executive_summary': executive_summary,
-            'technical_timeline': technical_timeline,
-            'action_items': action_items,
-            'impact_assessment': impact_assessment,
-            'ai_insights': ai_insights,
+            'executive_summary': self._generate_executive_summary(state, status, categories),
+            'technical_timeline': list(state.timeline),
+            'action_items': state.action_items,
+            'impact_assessment': state.impact_assessment(),
+            'ai_insights': insights,
+            'ai_insights_refreshed_at': refreshed_at,
+            'ai_insights_reused': reused,
+            'ai_insights_pending': pending is not None,
             'generated_at': datetime.now().isoformat()
         }
+        if scope is not None:
+            summary['incident_overview'].update({
+                'analysis_runs': state.analyses_run,
+                'tracking_since': state.started_at.isoformat()
+            })
+        return summary, pending
     
-    def _generate_executive_summary(self, messages: List[Dict], categories: Dict[str, int]) -> str:
+    def _get_insights_executor(self) -> ThreadPoolExecutor:
+        if self._insights_executor is None:
+            self._insights_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='insights')
+        return self._insights_executor
+    
+    def _insights_fields(self, messages: List[Dict], categories: Dict[str, int], scope: Optional[Any],
+                         events: Optional[int] = None) -> Dict[str, Any]:
+        """Background task for deferred summaries: the ai_insights* fields of the finished summary"""
+        insights, refreshed_at, reused = self._get_ai_insights(messages, categories, scope, events)
+        return {
+            'ai_insights': insights,
+            'ai_insights_refreshed_at': refreshed_at,
+            'ai_insights_reused': reused,
+            'ai_insights_pending': False
+        }
+    
+    def _generate_executive_summary(self, state: IncidentState, status: str, categories: Dict[str, int]) -> str:
         """Generate executive-level summary"""
         
-        if not messages:
+        if not state.significant_messages:
             return "No significant incident activity detected."
         
-        # Build summary components
-        summary_parts = []
-        
-        # Status and scope
-        status = self._determine_incident_status(messages)
-        summary_parts.append(f"Incident Status: {status}")
-        
-        # Activity overview
-        activity_desc = self._describe_activity_level(categories)
-        summary_parts.append(activity_desc)
+        # Status and scope, activity overview
+        summary_parts = [f"Incident Status: {status}", self._describe_activity_level(categories)]
         
         # Key outcomes
-        outcomes = self._extract_key_outcomes(messages)
-        if outcomes:
-            summary_parts.append(f"Key Outcomes: {outcomes}")
+        outcomes = ', '.join(state.outcomes) if state.outcomes else "incident response in progress"
+        summary_parts.append(f"Key Outcomes: {outcomes}")
         
         # Business impact (if any)
-        impact = self._assess_business_impact(messages)
-        if impact:
-            summary_parts.append(f"Impact: {impact}")
+        if state.business_impact:
+            summary_parts.append(f"Impact: {', '.join(state.business_impact)}")
         
         return ". ".join(summary_parts) + "."
     
-    def _generate_technical_timeline(self, messages: List[Dict]) -> List[Dict[str, Any]]:
-        """Generate technical timeline of events"""
-        
-        timeline = []
-        for msg in messages:
-            timeline_entry = {
-                'timestamp': msg.get('timestamp', ''),
-                'user': msg.get('user', 'Unknown'),
-                'category': msg.get('category', '').upper(),
-                'event': msg.get('original_text', ''),
-                'significance': msg.get('reason', ''),
-                'message_id': msg.get('message_id', 0)
-            }
-            timeline.append(timeline_entry)
-        
-        return timeline
-    
-    def _generate_action_items(self, messages: List[Dict]) -> List[Dict[str, Any]]:
-        """Extract and generate action items"""
-        
-        action_items = []
-        seen_descriptions = set()  # Track unique descriptions
-        
-        # Extract actions taken
-        actions_taken = [msg for msg in messages if msg.get('category') == 'actions']
-        for action in actions_taken:
-            description = action.get('original_text', '')
-            if description not in seen_descriptions:
-                action_items.append({
-                    'type': 'completed_action',
-                    'description': description,
-                    'timestamp': action.get('timestamp', ''),
-                    'user': action.get('user', ''),
-                    'status': 'completed'
-                })
-                seen_descriptions.add(description)
-        
-        # Extract follow-up items from resolution messages
-        resolutions = [msg for msg in messages if msg.get('category') == 'resolution']
-        monitoring_added = False
-        postmortem_added = False
-        
-        for resolution in resolutions:
-            text = resolution.get('original_text', '').lower()
-            if 'monitor' in text and not monitoring_added:
-                action_items.append({
-                    'type': 'follow_up',
-                    'description': 'Continue monitoring system stability',
-                    'timestamp': resolution.get('timestamp', ''),
-                    'status': 'pending'
-                })
-                monitoring_added = True
-            if ('post-mortem' in text or 'rca' in text) and not postmortem_added:
-                action_items.append({
-                    'type': 'follow_up', 
-                    'description': 'Complete post-mortem analysis',
-                    'timestamp': resolution.get('timestamp', ''),
-                    'status': 'pending'
-                })
-                postmortem_added = True
-        
-        # Suggest preventive actions based on diagnostics (deduplicated)
-        diagnostics = [msg for msg in messages if msg.get('category') == 'diagnostics']
-        memory_monitoring_added = False
-        connection_pool_added = False
-        
-        for diagnostic in diagnostics:
-            reason = diagnostic.get('reason', '').lower()
-            if 'memory leak' in reason and not memory_monitoring_added:
-                action_items.append({
-                    'type': 'preventive',
-                    'description': 'Implement memory usage monitoring and alerts',
-                    'status': 'suggested'
-                })
-                memory_monitoring_added = True
-            elif 'connection pool' in reason and not connection_pool_added:
-                action_items.append({
-                    'type': 'preventive',
-                    'description': 'Review and optimize database connection pool configuration',
-                    'status': 'suggested'
-                })
-                connection_pool_added = True
-        
-        return action_items
-    
-    def _generate_impact_assessment(self, messages: List[Dict], categories: Dict[str, int]) -> Dict[str, Any]:
-        """Assess incident impact"""
-        
-        impact_msgs = [msg for msg in messages if msg.get('category') == 'impact']
-        
-        assessment = {
-            'severity': 'unknown',
-            'scope': 'unknown',
-            'customer_impact': 'unknown',
-            'duration': 'unknown',
-            'services_affected': []
-        }
+    def _get_ai_insights(self, messages: List[Dict], categories: Dict[str, int], scope: Optional[Any] = None,
+                         events: Optional[int] = None) -> Tuple[str, Optional[str], bool]:
+        """
+        Return AI insights, reusing earlier ones when the significant messages have not changed enough
+        
+        Insights are cached by a fingerprint of the prompt context. Within a scope (one channel's
+        rolling incident), they are also reused until a new category appears, a new resolution
+        arrives, or more than refresh_events new significant events accumulate.
         
-        # Extract impact details from messages
-        for msg in impact_msgs:
-            text = msg.get('original_text', '').lower()
-            reason = msg.get('reason', '').lower()
+        Args:
+            events: Significant events in the whole incident (defaults to len(messages), which may be capped)
+        
+        Returns:
+            Tuple of (insights, ISO time they were last refreshed, whether they were reused)
+        """
+        if not messages:
+            return self._generate_ai_insights(messages), None, False
+        
+        events = len(messages) if events is None else events
+        context = self._build_insights_context(messages)
+        cached = self._lookup_insights(context, events, categories, scope)
+        if cached is not None:
+            return cached
+        
+        fingerprint, snapshot = self._insights_key(context, categories, events)
+        insights = self._generate_ai_insights(messages, context)
+        refreshed_at = datetime.now().isoformat()
+        
+        with self._insights_lock:
+            self.insights_stats['generated'] += 1
+            if insights.startswith("AI insights unavailable"):
+                return insights, None, False  # retry on the next summary
             
-            # Assess severity
-            if 'outage' in text or 'unavailable' in text:
-                assessment['severity'] = 'high'
-            elif 'degraded' in text or 'slow' in text:
-                assessment['severity'] = 'medium'
+            self._insights_by_fingerprint[fingerprint] = (insights, refreshed_at)
+            while len(self._insights_by_fingerprint) > MAX_CACHED_INSIGHTS:
+                self._insights_by_fingerprint.popitem(last=False)
+            if scope is not None:
+                self._insights_by_scope[scope] = dict(snapshot, insights=insights, refreshed_at=refreshed_at)
+                self._insights_by_scope.move_to_end(scope)
+                while len(self._insights_by_scope) > MAX_CACHED_INSIGHTS:
+                    self._insights_by_scope.popitem(last=False)
+        return insights, refreshed_at, False
+    
+    def _insights_key(self, context: str, categories: Dict[str, int], events: int) -> Tuple[str, Dict[str, Any]]:
+        """Fingerprint of the prompt context plus the snapshot used for the changed-enough check"""
+        fingerprint = hashlib.sha256(f"{self.model}\x00{context}".encode('utf-8')).hexdigest()
+        snapshot = {
+            'categories': {category for category, count in categories.items() if count},
+            'resolutions': categories.get('resolution', 0),
+            'events': events
+        }
+        return fingerprint, snapshot
+    
+    def _lookup_insights(self, context: str, events: int, categories: Dict[str, int],
+                         scope: Optional[Any] = None) -> Optional[Tuple[str, Optional[str], bool]]:
+        """Reusable insights for this context, or None when they must be generated"""
+        fingerprint, snapshot = self._insights_key(context, categories, events)
+        with self._insights_lock:
+            cached = self._insights_by_fingerprint.get(fingerprint)
+            previous = self._insights_by_scope.get(scope) if scope is not None else None
+            if cached is None and previous is not None and not self._insights_need_refresh(previous, snapshot):
+                cached = (previous['insights'], previous['refreshed_at'])
+            if cached is None:
+                return None
             
-            # Extract customer impact
-            if '%' in text:
-                import re
-                percentages = re.findall(r'(\d+)%', text)
-                if percentages:
-                    assessment['customer_impact'] = f"{percentages[0]}% affected"
-        
-        # Infer from other categories if no explicit impact messages
-        if not impact_msgs:
-            if categories.get('actions', 0) > 2:
-                assessment['severity'] = 'medium'
-                assessment['scope'] = 'service-level'
-            if categories.get('resolution', 0) > 0:
-                assessment['duration'] = 'resolved'
-        
-        return assessment
-    
-    def _generate_ai_insights(self, messages: List[Dict]) -> str:
-        """Generate AI-powered insights using Claude"""
+            self._insights_by_fingerprint[fingerprint] = cached
+            self._insights_by_fingerprint.move_to_end(fingerprint)
+            self.insights_stats['reused'] += 1
+        insights, refreshed_at = cached
+        return insights, refreshed_at, True
+    
+    def _insights_need_refresh(self, previous: Dict[str, Any], snapshot: Dict[str, Any]) -> bool:
+        """Whether the significant messages changed enough since insights were last generated"""
+        return (
+            bool(snapshot['categories'] - previous['categories'])
+            or snapshot['resolutions'] > previous['resolutions']
+            or snapshot['events'] - previous['events'] > self.refresh_events
+        )
+    
+    def _build_insights_context(self, messages: List[Dict]) -> str:
+        """Prompt context: one line per significant message, numbered by its message ID"""
+        context = "Incident Messages:\n"
+        for section in self._insights_sections(messages):
+            context += "".join(f"{line}\n" for line in section)
+        return context
+    
+    def _insights_sections(self, messages: List[Dict]) -> List[List[str]]:
+        """
+        Context lines grouped by INSIGHTS_CHUNK_SPAN-wide ranges of message IDs
+        
+        Message IDs are stable for the whole incident, so when IncidentState drops its oldest
+        events only the first group changes and the cached summaries of the others still match.
+        """
+        sections = []
+        group = None
+        for i, msg in enumerate(messages, 1):
+            number = msg.get('message_id', i)
+            if number // INSIGHTS_CHUNK_SPAN != group:
+                group = number // INSIGHTS_CHUNK_SPAN
+                sections.append([])
+            sections[-1].append(f"{number}. [{(msg.get('category') or 'unknown').upper()}] {msg.get('original_text', '')}")
+        return sections
+    
+    def _generate_ai_insights(self, messages: List[Dict], context: Optional[str] = None) -> str:
+        """Generate AI-powered insights using Claude (map-reduce over chunks for long incidents)"""
         
         if not messages:
             return "No significant messages to analyze for insights."
         
         # Prepare context for AI analysis
-        context = "Incident Messages:\n"
-        for i, msg in enumerate(messages[:10], 1):  # Limit to first 10 for context
-            context += f"{i}. [{msg.get('category', 'unknown').upper()}] {msg.get('original_text', '')}\n"
+        if context is None:
+            context = self._build_insights_context(messages)
         
-        prompt = f"""
+        try:
+            if _estimate_tokens(context) > INSIGHTS_CHUNK_TOKENS:
+                context = self._reduce_context(self._insights_sections(messages))
+            return self._call_model(self._insights_prompt(context), 400, 'insights')
+        except Exception as e:
+            return f"AI insights unavailable: {str(e)}"
+    
+    def _insights_prompt(self, context: str) -> str:
+        return f"""
         Analyze this incident conversation and provide strategic insights:
         
         {context}
@@ -232,44 +327,115 @@ class IncidentSummaryGenerator:
         Focus on executive-level insights that would help prevent similar incidents.
         Keep response to 2-3 sentences per point.
         """
-        
-        try:
-            response = self.analyzer.client.messages.create(
-                model="claude-3-5-haiku@20241022",
-                max_tokens=400,
-                messages=[{"role": "user", "content": prompt}]
+    
+    def _reduce_context(self, sections: List[List[str]]) -> str:
+        """
+        Map-reduce message lines into phase summaries that fit one prompt
+        
+        Each section's lines are packed into consecutive chunks within INSIGHTS_CHUNK_TOKENS, so
+        appending messages only changes the last chunk and dropping old ones only the first
+        section's chunks; every other chunk summary stays cached. Chunks
+        are summarized concurrently; if the summaries still do not fit, they are combined
+        again level by level. When a level would not reduce the number of chunks (the budget
+        is too small for the summaries themselves) or INSIGHTS_MAX_REDUCE_LEVELS is reached,
+        the context is truncated instead.
+        """
+        level = 0
+        chunks = [chunk for section in sections for chunk in self._split_into_chunks(section, INSIGHTS_CHUNK_TOKENS)]
+        while True:
+            summaries = self._summarize_chunks(chunks, level)
+            context = "Incident phase summaries (chronological):\n" + "\n".join(
+                f"{i}. {summary}" for i, summary in enumerate(summaries, 1)
             )
-            return response.content[0].text
-        except Exception as e:
-            return f"AI insights unavailable: {str(e)}"
+            if len(chunks) == 1 or _estimate_tokens(context) <= INSIGHTS_CHUNK_TOKENS:
+                return context
+            lines = [f"Phase {i}: {summary}" for i, summary in enumerate(summaries, 1)]
+            next_chunks = self._split_into_chunks(lines, INSIGHTS_CHUNK_TOKENS)
+            level += 1
+            if len(next_chunks) >= len(chunks) or level >= INSIGHTS_MAX_REDUCE_LEVELS:
+                return self._truncate_context(summaries)
+            chunks = next_chunks
     
-    def _determine_incident_status(self, messages: List[Dict]) -> str:
-        """Determine current incident status"""
-        
-        if not messages:
-            return "No Activity"
-        
-        # Check for resolution messages
-        resolution_msgs = [msg for msg in messages if msg.get('category') == 'resolution']
-        if resolution_msgs:
-            latest_resolution = resolution_msgs[-1]
-            text = latest_resolution.get('original_text', '').lower()
-            if 'resolved' in text:
-                return "Resolved"
-            elif 'monitoring' in text:
-                return "Monitoring"
-        
-        # Check for recent actions
-        action_msgs = [msg for msg in messages if msg.get('category') == 'actions']
-        if action_msgs:
-            return "Active Response"
-        
-        # Check for diagnostics
-        diagnostic_msgs = [msg for msg in messages if msg.get('category') == 'diagnostics']
-        if diagnostic_msgs:
-            return "Under Investigation"
-        
-        return "Active"
+    def _truncate_context(self, summaries: List[str]) -> str:
+        """Newest phase summaries that fit INSIGHTS_CHUNK_TOKENS, noting how many earlier ones were dropped"""
+        budget = INSIGHTS_CHUNK_TOKENS * 4  # characters
+        kept = []
+        used = 0
+        for i in range(len(summaries), 0, -1):
+            line = f"{i}. {summaries[i - 1]}"
+            if kept and used + len(line) > budget:
+                break
+            kept.append(line[:budget])
+            used += len(line)
+        omitted = len(summaries) - len(kept)
+        header = "Incident phase summaries (chronological"
+        header += f", {omitted} earlier phases omitted):\n" if omitted else "):\n"
+        return header + "\n".join(reversed(kept))
+    
+    def _split_into_chunks(self, lines: List[str], budget: int) -> List[List[str]]:
+        """Pack consecutive lines into chunks whose estimated size stays within the budget"""
+        chunks = []
+        current = []
+        used = 0
+        for line in lines:
+            cost = _estimate_tokens(line)
+            if current and used + cost > budget:
+                chunks.append(current)
+                current, used = [], 0
+            current.append(line)
+            used += cost
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def _summarize_chunks(self, chunks: List[List[str]], level: int) -> List[str]:
+        """Summarize chunks concurrently, reusing cached summaries of unchanged chunks"""
+        keys = [
+            hashlib.sha256((f"{self.model}\x00{level}\x00" + "\n".join(chunk)).encode('utf-8')).hexdigest()
+            for chunk in chunks
+        ]
+        with self._insights_lock:
+            known = {key: self._chunk_summaries[key] for key in keys if key in self._chunk_summaries}
+            self.insights_stats['chunks_cached'] += len(known)
+        missing = {key: chunk for key, chunk in zip(keys, chunks) if key not in known}
+        
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, min(INSIGHTS_MAP_WORKERS, len(missing)))) as pool:
+                context = contextvars.copy_context()
+                known.update(zip(missing, pool.map(
+                    lambda chunk: context.copy().run(self._summarize_chunk, chunk, level), missing.values()
+                )))
+        
+        with self._insights_lock:
+            self.insights_stats['chunks_summarized'] += len(missing)
+            for key in keys:
+                self._chunk_summaries[key] = known[key]
+                self._chunk_summaries.move_to_end(key)
+            while len(self._chunk_summaries) > MAX_CACHED_CHUNK_SUMMARIES:
+                self._chunk_summaries.popitem(last=False)
+        return [known[key] for key in keys]
+    
+    def _summarize_chunk(self, lines: List[str], level: int) -> str:
+        """Map step: condense one chunk of messages (or of lower-level summaries)"""
+        subject = "incident messages" if level == 0 else "summaries of consecutive incident phases"
+        prompt = (
+            f"Summarize these {subject} in 3-4 sentences: what was observed, what was done, "
+            f"and what changed. Keep service names, numbers and times.\n\n" + "\n".join(lines)
+        )
+        return self._call_model(prompt, 250, 'insights_map').strip()
+    
+    def _call_model(self, prompt: str, max_tokens: int, call_type: str) -> str:
+        """One Messages API call with usage accounting"""
+        with get_governor().slot(estimate_tokens(prompt, max_tokens)) as usage:
+            started = time.perf_counter()
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            usage['actual_tokens'] = response_tokens(response)
+        usage_tracker.record(call_type, self.model, response, (time.perf_counter() - started) * 1000)
+        return response.content[0].text
     
     def _describe_activity_level(self, categories: Dict[str, int]) -> str:
         """Describe the level and type of incident activity"""
@@ -284,40 +450,6 @@ class IncidentSummaryGenerator:
                 activity_types.append(f"{count} {category}")
         
         return f"Detected {total_activity} significant events: {', '.join(activity_types)}"
-    
-    def _extract_key_outcomes(self, messages: List[Dict]) -> str:
-        """Extract key outcomes from the incident"""
-        
-        # Look for resolution and final state messages
-        outcomes = []
-        
-        for msg in messages:
-            text = msg.get('original_text', '').lower()
-            if msg.get('category') == 'resolution':
-                if 'resolved' in text:
-                    outcomes.append("incident resolved")
-                if 'monitor' in text:
-                    outcomes.append("monitoring stability")
-            elif 'normal' in text or 'baseline' in text:
-                outcomes.append("performance restored")
-        
-        return ', '.join(outcomes) if outcomes else "incident response in progress"
-    
-    def _assess_business_impact(self, messages: List[Dict]) -> str:
-        """Assess business impact from messages"""
-        
-        impact_indicators = []
-        
-        for msg in messages:
-            text = msg.get('original_text', '').lower()
-            if 'customer' in text and '%' in text:
-                impact_indicators.append("customer impact detected")
-            elif 'outage' in text:
-                impact_indicators.append("service outage")
-            elif 'degraded' in text:
-                impact_indicators.append("service degradation")
-        
-        return ', '.join(impact_indicators) if impact_indicators else None
 
 
 def main():
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Summary Rules - Data-driven rules for action items, impact, status and outcomes
+Rules live in summary_rules.json, are compiled into one combined literal matcher per message
+field plus one matcher per regex pattern, and are reloaded when the file changes
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+DEFAULT_RULES_PATH = os.getenv(
+    'SUMMARY_RULES_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'summary_rules.json')
+)
+RELOAD_INTERVAL = float(os.getenv('SUMMARY_RULES_RELOAD_INTERVAL', '5'))
+
+RULE_KINDS = ('follow_up', 'preventive', 'severity', 'customer_impact', 'status', 'outcome', 'business_impact')
+RULE_FIELDS = ('text', 'reason')
+
+_REGEX_METACHARACTERS = set('.^$*+?{}[]\\|()')
+
+
+class CompiledRules:
+    def __init__(self, rules: List[Dict[str, Any]]):
+        """
+        Compile rule definitions into matchers per field
+
+        Literal keywords share one alternation of zero-width named groups per field. At each
+        position only the first matching alternative is reported, so longer literals come first
+        and a literal match also counts for the shorter literals it contains ('monitoring' /
+        'monitor'); two literals can only start at the same position when one contains the other.
+        Regex patterns can overlap anything, so each gets its own matcher and is searched separately.
+
+        Args:
+            rules: Rule definitions as loaded from the rules file
+        """
+        self.rules = [self._validate(rule) for rule in rules]
+
+        pattern_ids = {}  # (field, pattern) -> group name
+        self.rules_by_group = {}  # group name -> indices of rules using it
+        for index, rule in enumerate(self.rules):
+            group_names = []
+            for pattern in rule['patterns']:
+                key = (rule['field'], pattern)
+                if key not in pattern_ids:
+                    pattern_ids[key] = f"p{len(pattern_ids)}"
+                group_names.append(pattern_ids[key])
+                self.rules_by_group.setdefault(pattern_ids[key], set()).add(index)
+            rule['_groups'] = group_names
+
+        self.matchers = {}  # field -> combined literal matcher
+        self.regex_matchers = {}  # field -> [(group name, compiled regex pattern)]
+        self.implied = {}  # group name -> group names (with literal text) also matched by it
+        for field in RULE_FIELDS:
+            patterns = [(pattern, name) for (f, pattern), name in pattern_ids.items() if f == field]
+            literals = sorted(((pattern, name) for pattern, name in patterns if self._is_literal(pattern)),
+                              key=lambda item: -len(item[0]))
+            self.regex_matchers[field] = [(name, re.compile(pattern, re.IGNORECASE))
+                                          for pattern, name in patterns if not self._is_literal(pattern)]
+            if not literals:
+                continue
+            self.matchers[field] = re.compile(
+                '|'.join(f"(?=(?P<{name}>{re.escape(pattern)}))" for pattern, name in literals), re.IGNORECASE
+            )
+            for pattern, name in literals:
+                self.implied[name] = [(name, None)] + [(other, literal.lower()) for literal, other in literals
+                                                       if other != name and literal.lower() in pattern.lower()]
+
+    @staticmethod
+    def _is_literal(pattern: str) -> bool:
+        return not (_REGEX_METACHARACTERS & set(pattern))
+
+    @staticmethod
+    def _validate(rule: Dict[str, Any]) -> Dict[str, Any]:
+        rule = dict(rule)
+        rule.setdefault('field', 'text')
+        if not rule.get('name') or rule.get('kind') not in RULE_KINDS:
+            raise ValueError(f"Rule needs a name and a kind in {RULE_KINDS}: {rule}")
+        if rule['field'] not in RULE_FIELDS or not rule.get('patterns'):
+            raise ValueError(f"Rule {rule['name']} needs patterns and a field in {RULE_FIELDS}")
+        for pattern in rule['patterns']:
+            re.compile(pattern)
+        return rule
+
+
+class SummaryRules:
+    def __init__(self, path: Optional[str] = DEFAULT_RULES_PATH, reload_interval: float = RELOAD_INTERVAL):
+        """
+        Initialize the rule engine
+
+        Args:
+            path: Rules file (JSON with a 'rules' list)
+            reload_interval: Seconds between checks of the file's modification time (0 disables reloading)
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self._compiled = CompiledRules([])
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.stats = {'reloads': 0, 'reload_errors': 0}
+
+        if path:
+            self.reload()
+
+    def reload(self) -> bool:
+        """Load and compile the rules file, keeping the current rules if it is invalid"""
+        try:
+            self._mtime = os.path.getmtime(self.path)  # a broken version is only tried once
+            with open(self.path, 'r') as f:
+                compiled = CompiledRules(json.load(f).get('rules', []))
+        except Exception as e:
+            print(f"⚠️ Could not load summary rules from {self.path}: {e}")
+            self.stats['reload_errors'] += 1
+            return False
+
+        # Swap in one assignment so concurrent evaluations see either the old or the new rules
+        self._compiled = compiled
+        self.stats['reloads'] += 1
+        return True
+
+    def maybe_reload(self):
+        """Reload if the rules file changed (checked at most once per reload_interval)"""
+        if not self.path or not self.reload_interval:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+
+        with self._lock:
+            if now - self._last_check < self.reload_interval:
+                return
+            self._last_check = now
+            try:
+                changed = os.path.getmtime(self.path) != self._mtime
+            except OSError:
+                return
+            if changed:
+                print(f"🔄 Reloading summary rules from {self.path}")
+                self.reload()
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._compiled.rules)
+
+    def evaluate(self, category: Optional[str], text: str, reason: str = '') -> List[Dict[str, Any]]:
+        """
+        Match one message against every rule: one scan per field for literals, one search per regex
+
+        Args:
+            category: The message's category
+            text: Message text
+            reason: Classifier reason for the message
+
+        Returns:
+            Fired rules in file order, as dicts with name, kind and value; within a rule
+            'group', only the first matching rule fires
+        """
+        self.maybe_reload()
+        compiled = self._compiled
+
+        found = {}  # group name -> matched text
+        for field, value in (('text', text), ('reason', reason)):
+            if not value:
+                continue
+            matcher = compiled.matchers.get(field)
+            if matcher is not None:
+                for match in matcher.finditer(value):
+                    for name, literal in compiled.implied[match.lastgroup]:
+                        found.setdefault(name, literal if literal is not None else match.group(match.lastgroup))
+            for name, pattern in compiled.regex_matchers.get(field, ()):
+                match = pattern.search(value)
+                if match is not None:
+                    found.setdefault(name, match.group(0))
+
+        candidates = sorted({index for name in found for index in compiled.rules_by_group.get(name, ())})
+        hits = []
+        used_groups = set()
+        for index in candidates:
+            rule = compiled.rules[index]
+            if 'categories' in rule and category not in rule['categories']:
+                continue
+            if category in rule.get('exclude_categories', ()):
+                continue
+            matched = [name for name in rule['_groups'] if name in found]
+            if rule.get('require_all') and len(matched) < len(rule['_groups']):
+                continue
+            group = rule.get('group')
+            if group in used_groups:
+                continue
+            if group:
+                used_groups.add(group)
+
+            hits.append({
+                'name': rule['name'],
+                'kind': rule['kind'],
+                'value': rule.get('value', '').replace('{match}', found[matched[0]])
+            })
+
+        return hits
+
+
+_default_rules = None
+_default_lock = threading.Lock()
+
+
+def get_default_rules() -> SummaryRules:
+    """Process-wide rule engine loaded from SUMMARY_RULES_PATH"""
+    global _default_rules
+    with _default_lock:
+        if _default_rules is None:
+            _default_rules = SummaryRules()
+        return _default_rules
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test the ingestion path offline: event source, dedup index, deadline scheduler and LLM governor
+No Slack or Vertex AI credentials needed; events are replayed through FakeEventSource
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Keep the bot's cache and watermarks in memory for this run
+os.environ.setdefault('CLASSIFICATION_CACHE_PATH', '')
+os.environ.setdefault('POLL_WATERMARK_PATH', '')
+os.environ.setdefault('NAME_CACHE_WARM', 'false')
+
+from event_ingestion import FakeEventSource
+from message_dedup import DedupIndex, ts_key
+from trigger_scheduler import DeadlineScheduler
+from llm_governor import LLMGovernor, PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_LOW
+from slack_bot import IncidentSlackBot
+
+results = []
+
+
+def check(name: str, passed: bool, detail: str = ""):
+    results.append(passed)
+    print(f"  {'✅' if passed else '❌'} {name}{f' ({detail})' if detail and not passed else ''}")
+
+
+class OfflineBot(IncidentSlackBot):
+    """Bot with Slack lookups stubbed out"""
+
+    def _get_bot_info(self):
+        self.bot_user_id = 'UBOT'
+
+    def _get_user_name(self, user_id: str) -> str:
+        return user_id
+
+    def _get_channel_name(self, channel_id: str) -> str:
+        return channel_id
+
+
+def message(ts: str, text: str = "checkout is returning 502s", channel: str = 'C1', **extra):
+    return dict({'type': 'message', 'channel': channel, 'user': 'U1', 'ts': ts, 'text': text}, **extra)
+
+
+def run_event_source_checks():
+    print("\n📡 FakeEventSource + IncidentSlackBot.handle_event")
+    bot = OfflineBot('xoxb-offline')
+    bot.message_threshold = 1000  # keep analyses out of this test
+    bot.monitored_channels.add('C1')
+    bot.message_buffer['C1'] = []
+
+    source = FakeEventSource([
+        message('1700000000.000100'),
+        message('1700000000.000200', subtype='file_share'),
+        message('1700000000.000300', subtype='thread_broadcast'),
+        message('1700000000.000400', text="<@U2> has joined the channel", subtype='channel_join'),
+        message('1700000000.000500', subtype='message_changed'),
+        message('1700000000.000100'),  # redelivered
+        message('1700000000.000600', channel='C2'),  # not monitored
+        {'type': 'reaction_added', 'channel': 'C1'},
+    ])
+    bot.event_source = source
+    source.start(bot.handle_event)
+    source.push(message('1700000000.000700', text="rolled back api-gateway to v41"))
+
+    buffered = [m['raw_data']['ts'] for m in bot.message_buffer['C1']]
+    check("replays queued events on start, then pushes live ones", source.stats['events_received'] == 9,
+          f"{source.stats}")
+    check("file_share and thread_broadcast are ingested",
+          buffered == ['1700000000.000100', '1700000000.000200', '1700000000.000300', '1700000000.000700'],
+          f"{buffered}")
+    check("joins, edits, duplicates and other channels are skipped", len(buffered) == 4)
+    check("buffered messages arm the channel's deadline", 'C1' in bot.trigger_scheduler)
+
+    source.disconnect()
+    check("disconnect reports the source as down", not source.is_connected())
+    bot.analysis_pool.shutdown(wait=False)
+
+
+def run_dedup_checks():
+    print("\n🧮 DedupIndex")
+    index = DedupIndex(window=3)
+    check("first sighting is new", index.mark('C1', '1700000000.000100'))
+    check("exact redelivery is a duplicate", not index.mark('C1', '1700000000.000100'))
+    check("ts strings are ordered exactly", ts_key('1700000000.000100') < ts_key('1700000000.000101'))
+    for ts in ('1700000000.000200', '1700000000.000300', '1700000000.000400'):
+        index.mark('C1', ts)
+    check("evicted messages stay seen through the low watermark", index.seen('C1', '1700000000.000100'))
+    check("messages below the watermark are not re-ingested", not index.mark('C1', '1700000000.000050'))
+    check("channels are independent", index.mark('C2', '1700000000.000100'))
+    stats = index.get_stats()
+    check("window is bounded", stats['tracked'] == 4 and stats['evictions'] == 1, f"{stats}")
+
+
+def run_scheduler_checks():
+    print("\n⏰ DeadlineScheduler")
+    fired = []
+    scheduler = DeadlineScheduler(fired.append)
+    now = time.monotonic()
+    scheduler.schedule('C1', 10)
+    scheduler.schedule('C2', 20)
+    scheduler.schedule('C1', 30, only_if_earlier=True)  # later than the current deadline, ignored
+    scheduler.schedule('C2', 5)  # moved earlier
+    scheduler.schedule('C3', 1)
+    scheduler.cancel('C3')
+
+    check("nothing fires before the first deadline", scheduler.run_due(now) == 0)
+    scheduler.run_due(now + 6)
+    check("moved deadline fires at its new time", fired == ['C2'], f"{fired}")
+    scheduler.run_due(now + 11)
+    check("only_if_earlier keeps the sooner deadline", fired == ['C2', 'C1'], f"{fired}")
+    scheduler.run_due(now + 60)
+    check("cancelled and superseded entries never fire", fired == ['C2', 'C1'], f"{fired}")
+
+    scheduler.start()
+    scheduler.schedule('C4', 0.05)
+    time.sleep(0.3)
+    scheduler.stop()
+    check("scheduler thread fires due deadlines", fired[-1:] == ['C4'], f"{fired}")
+
+
+def run_governor_checks():
+    print("\n🚦 LLMGovernor")
+    governor = LLMGovernor(max_concurrency=1)
+    order = []
+
+    def call(priority: int, name: str):
+        with governor.slot(priority=priority):
+            order.append(name)
+
+    with governor.slot(priority=PRIORITY_NORMAL):
+        threads = []
+        for priority, name in ((PRIORITY_LOW, 'low'), (PRIORITY_NORMAL, 'normal'), (PRIORITY_URGENT, 'urgent')):
+            thread = threading.Thread(target=call, args=(priority, name))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.05)  # make sure each one is queued
+        check("calls wait while the only slot is held", not order and governor.get_stats()['queue_depth'] == 3)
+    for thread in threads:
+        thread.join(timeout=5)
+    check("waiting calls are served in priority order", order == ['urgent', 'normal', 'low'], f"{order}")
+
+    limited = LLMGovernor(max_concurrency=4, tokens_per_minute=6000)
+    limited.release(limited.acquire(5000), actual_tokens=5900)
+    check("token quota is corrected with actual usage", limited.get_stats()['tokens_available'] < 200,
+          f"{limited.get_stats()}")
+
+
+def main():
+    """Run every offline ingestion check"""
+    print("Offline Ingestion Tests")
+    print("=" * 60)
+
+    run_event_source_checks()
+    run_dedup_checks()
+    run_scheduler_checks()
+    run_governor_checks()
+
+    print("\n" + "=" * 60)
+    print(f"SUMMARY: {sum(results)}/{len(results)} checks passed")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
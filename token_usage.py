@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Token Usage Tracker - Per-call accounting of input, cached and output tokens
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+USAGE_FIELDS = ('input_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens', 'output_tokens')
+
+
+class TokenUsageTracker:
+    def __init__(self, max_records: int = 500):
+        """
+        Initialize the tracker
+
+        Args:
+            max_records: Number of recent per-call records kept for inspection
+        """
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self.totals = {field: 0 for field in USAGE_FIELDS}
+        self.totals.update({'calls': 0, 'latency_ms': 0.0})
+        self.by_call_type = {}
+
+    def record(self, call_type: str, model: str, response: Any, latency_ms: float):
+        """
+        Record usage reported by a Messages API response
+
+        Args:
+            call_type: What the call was for (e.g. 'single', 'batch', 'insights')
+            model: Model that served the call
+            response: Messages API response carrying a `usage` attribute
+            latency_ms: Wall-clock duration of the call
+        """
+        usage = getattr(response, 'usage', None)
+        record = {
+            'call_type': call_type,
+            'model': model,
+            'latency_ms': round(latency_ms, 1),
+            'recorded_at': time.time()
+        }
+        for field in USAGE_FIELDS:
+            record[field] = getattr(usage, field, None) or 0
+
+        with self._lock:
+            self._records.append(record)
+            for bucket in (self.totals, self.by_call_type.setdefault(call_type, {})):
+                bucket['calls'] = bucket.get('calls', 0) + 1
+                bucket['latency_ms'] = bucket.get('latency_ms', 0.0) + latency_ms
+                for field in USAGE_FIELDS:
+                    bucket[field] = bucket.get(field, 0) + record[field]
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the most recent per-call records, oldest first"""
+        with self._lock:
+            records = list(self._records)
+        return records[-limit:] if limit else records
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return totals plus cache hit ratio and average latency"""
+        with self._lock:
+            stats = dict(self.totals)
+            stats['by_call_type'] = {name: dict(bucket) for name, bucket in self.by_call_type.items()}
+
+        prompt_tokens = stats['input_tokens'] + stats['cache_read_input_tokens'] + stats['cache_creation_input_tokens']
+        stats['cached_token_ratio'] = (stats['cache_read_input_tokens'] / prompt_tokens) * 100 if prompt_tokens else 0
+        stats['avg_latency_ms'] = stats['latency_ms'] / stats['calls'] if stats['calls'] else 0
+        return stats
+
+
+# Process-wide tracker shared by all analyzer components
+usage_tracker = TokenUsageTracker()
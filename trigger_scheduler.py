@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Trigger Scheduler - One deadline per channel on a shared heap
+A single thread sleeps until the earliest deadline and fires it, so idle channels cost
+nothing and rescheduling is O(log n)
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Any, Callable, Optional
+
+
+class DeadlineScheduler:
+    def __init__(self, on_due: Callable[[str], None], name: str = 'trigger-scheduler'):
+        """
+        Initialize the scheduler
+
+        Args:
+            on_due: Called with the key (channel ID) when its deadline passes, on the scheduler thread
+            name: Name of the scheduler thread
+        """
+        self.on_due = on_due
+        self.name = name
+        self._heap = []  # (deadline, sequence, key); superseded entries are skipped when popped
+        self._deadlines = {}  # key -> (deadline, sequence) of its live entry
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.stats = {'scheduled': 0, 'fired': 0, 'cancelled': 0, 'compactions': 0}
+
+    def schedule(self, key: str, delay: float, only_if_earlier: bool = False):
+        """
+        Set (or move) a key's deadline
+
+        Args:
+            key: Channel ID
+            delay: Seconds from now
+            only_if_earlier: Keep an existing deadline that is sooner than the new one
+        """
+        deadline = time.monotonic() + max(0.0, delay)
+        with self._condition:
+            current = self._deadlines.get(key)
+            if only_if_earlier and current is not None and current[0] <= deadline:
+                return
+            entry = (deadline, next(self._sequence), key)
+            self._deadlines[key] = entry[:2]
+            heapq.heappush(self._heap, entry)
+            self.stats['scheduled'] += 1
+            self._maybe_compact()
+            if deadline <= self._heap[0][0]:
+                self._condition.notify()  # new earliest deadline, wake the thread to re-arm
+
+    def cancel(self, key: str):
+        """Drop a key's deadline (its heap entry is discarded lazily)"""
+        with self._condition:
+            if self._deadlines.pop(key, None) is not None:
+                self.stats['cancelled'] += 1
+                self._maybe_compact()
+
+    def __contains__(self, key: str) -> bool:
+        with self._condition:
+            return key in self._deadlines
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Fire every deadline at or before now, returning how many fired"""
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, sequence, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) == (deadline, sequence):
+                    del self._deadlines[key]
+                    due.append(key)
+
+        for key in due:
+            self.stats['fired'] += 1
+            try:
+                self.on_due(key)
+            except Exception as e:
+                print(f"⚠️ Scheduled trigger for {key} failed: {e}")
+        return len(due)
+
+    def start(self):
+        """Start the scheduler thread"""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return dict(self.stats, pending=len(self._deadlines), heap_size=len(self._heap))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                # Skip superseded entries so we sleep until the earliest live deadline
+                while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][:2]:
+                    heapq.heappop(self._heap)
+                if self._stopped:
+                    return
+                timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+            self.run_due()
+
+    def _maybe_compact(self):
+        """Rebuild the heap once superseded entries outnumber live ones"""
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._deadlines):
+            self._heap = [(deadline, sequence, key) for key, (deadline, sequence) in self._deadlines.items()]
+            heapq.heapify(self._heap)
+            self.stats['compactions'] += 1
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Vertex Client Provider - Process-wide, lazily created Anthropic Vertex clients
+All analyzer components share one connection pool and one credential load per process
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+# Connection pool settings (overridable per deployment)
+MAX_CONNECTIONS = int(os.getenv('VERTEX_MAX_CONNECTIONS', '20'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('VERTEX_MAX_KEEPALIVE_CONNECTIONS', '10'))
+KEEPALIVE_EXPIRY = float(os.getenv('VERTEX_KEEPALIVE_EXPIRY', '30'))
+CONNECT_TIMEOUT = float(os.getenv('VERTEX_CONNECT_TIMEOUT', '5'))
+REQUEST_TIMEOUT = float(os.getenv('VERTEX_REQUEST_TIMEOUT', '60'))
+MAX_RETRIES = int(os.getenv('VERTEX_MAX_RETRIES', '2'))
+
+_lock = threading.Lock()
+_sync_clients: Dict[Tuple[str, str], Any] = {}
+# httpx.AsyncClient connections belong to the loop that opened them, so async clients are kept per event loop
+_async_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], Any]]' = \
+    weakref.WeakKeyDictionary()
+
+
+def _resolve(project_id: Optional[str], region: Optional[str]) -> Tuple[str, str]:
+    """Fill in project and region from the environment"""
+    return (
+        project_id or os.getenv('ANTHROPIC_VERTEX_PROJECT_ID'),
+        region or os.getenv('ANTHROPIC_VERTEX_REGION', 'us-east5')
+    )
+
+
+def _pool_settings():
+    """httpx limits and timeout shared by the sync and async clients"""
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+    timeout = httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+    return limits, timeout
+
+
+def get_vertex_client(project_id: Optional[str] = None, region: Optional[str] = None):
+    """
+    Return the shared synchronous AnthropicVertex client, creating it on first use
+
+    Args:
+        project_id: GCP project ID (defaults to ANTHROPIC_VERTEX_PROJECT_ID)
+        region: Vertex AI region (defaults to ANTHROPIC_VERTEX_REGION)
+    """
+    key = _resolve(project_id, region)
+    client = _sync_clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            import httpx
+            from anthropic import AnthropicVertex
+
+            limits, timeout = _pool_settings()
+            client = AnthropicVertex(
+                project_id=key[0],
+                region=key[1],
+                timeout=timeout,
+                max_retries=MAX_RETRIES,
+                http_client=httpx.Client(limits=limits, timeout=timeout)
+            )
+            _sync_clients[key] = client
+        return client
+
+
+def get_async_vertex_client(project_id: Optional[str] = None, region: Optional[str] = None):
+    """
+    Return the AsyncAnthropicVertex client shared within the running event loop, creating it on first use
+
+    Must be called from a coroutine; a later asyncio.run() gets a fresh client instead of one
+    whose connections are tied to a closed loop.
+
+    Args:
+        project_id: GCP project ID (defaults to ANTHROPIC_VERTEX_PROJECT_ID)
+        region: Vertex AI region (defaults to ANTHROPIC_VERTEX_REGION)
+    """
+    key = _resolve(project_id, region)
+    loop = asyncio.get_running_loop()
+
+    with _lock:
+        clients = _async_clients.get(loop)
+        if clients is None:
+            clients = _async_clients[loop] = {}
+        client = clients.get(key)
+        if client is None:
+            import httpx
+            from anthropic import AsyncAnthropicVertex
+
+            limits, timeout = _pool_settings()
+            client = AsyncAnthropicVertex(
+                project_id=key[0],
+                region=key[1],
+                timeout=timeout,
+                max_retries=MAX_RETRIES,
+                http_client=httpx.AsyncClient(limits=limits, timeout=timeout)
+            )
+            clients[key] = client
+        return client
+
+
+def reset_clients():
+    """Drop shared clients (e.g. after fork in a worker process)"""
+    with _lock:
+        _sync_clients.clear()
+        _async_clients.clear()